@@ -7,18 +7,23 @@ A framework for building intelligent agents with planning, execution, and synthe
 __version__ = "1.0.0"
 __author__ = "Breeze Agent Team"
 
-# Main components
-from .agents.orchestrator import Orchestrator
-from .llm.llm_client import LLMConnector
-from .prompts.prompt_manager import PromptManager
-from .registry.tool_registry import ToolRegistry
-
-# Core components
-from .agents.orchestrator_core.planning_manager import PlanningManager
-from .agents.orchestrator_core.tool_executor import ToolExecutor
-from .agents.orchestrator_core.query_rewriter import QueryRewriter
-from .agents.orchestrator_core.conversation_manager import ConversationManager
-from .agents.orchestrator_core.synthesis_generator import SynthesisGenerator
+import importlib
+
+# Components are imported on first attribute access (PEP 562), so importing the package
+# (e.g. for the CLI's --help / --version) doesn't pull in openai, mtkresearch or httpx.
+_LAZY_IMPORTS = {
+    # Main components
+    "Orchestrator": ".agents.orchestrator",
+    "LLMConnector": ".llm.llm_client",
+    "PromptManager": ".prompts.prompt_manager",
+    "ToolRegistry": ".registry.tool_registry",
+    # Core components
+    "PlanningManager": ".agents.orchestrator_core.planning_manager",
+    "ToolExecutor": ".agents.orchestrator_core.tool_executor",
+    "QueryRewriter": ".agents.orchestrator_core.query_rewriter",
+    "ConversationManager": ".agents.orchestrator_core.conversation_manager",
+    "SynthesisGenerator": ".agents.orchestrator_core.synthesis_generator",
+}
 
 __all__ = [
     "Orchestrator",
@@ -30,4 +35,17 @@ __all__ = [
     "QueryRewriter",
     "ConversationManager",
     "SynthesisGenerator"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value  # cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
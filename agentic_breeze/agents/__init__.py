@@ -1,8 +1,12 @@
 
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Optional
 
-@dataclass
+# 執行計畫統一定義於 orchestrator_core.modle.execution_plan，此處僅重新匯出，
+# 避免兩份同名類別造成 isinstance 判斷失準
+from .orchestrator_core.modle.execution_plan import ExecutionPlan, PlanItem
+
+@dataclass(slots=True, frozen=True)
 class ReasoningStep:
     """推理步驟的資料結構"""
     step_type: str  # "planning", "execution", "synthesis"
@@ -11,9 +15,3 @@ class ReasoningStep:
     result: Optional[str] = None
     error: Optional[str] = None
     raw_tool_result: Optional[Any] = None
-
-@dataclass
-class ExecutionPlan:
-    """執行計畫的資料結構"""
-    plan_items: List[Dict[str, Any]]
-    description: str = ""
@@ -1,6 +1,10 @@
 
 from typing import List, Dict, Optional
+import asyncio
+import concurrent.futures
+import unicodedata
 
+from ..llm.response_cache import ResponseCache
 from ..prompts.prompt_manager import PromptManager
 from .orchestrator_core.planning_manager import PlanningManager
 from .orchestrator_core.tool_executor import ToolExecutor
@@ -8,11 +12,25 @@ from .orchestrator_core.query_rewriter import QueryRewriter
 from .orchestrator_core.conversation_manager import ConversationManager
 from .orchestrator_core.synthesis_generator import SynthesisGenerator
 
+# 比對問題時忽略的句尾標點（NFKC 正規化後全形的 ？！～ 已轉為半形）
+_TRAILING_PUNCTUATION = "?!.。~"
+
+
+def _normalize_question(question: str) -> str:
+    """將問題正規化（NFKC、忽略大小寫、移除空白與句尾標點），讓近似重複的問法共用快取。"""
+    return "".join(unicodedata.normalize("NFKC", question).casefold().split()).rstrip(_TRAILING_PUNCTUATION)
+
+
 class Orchestrator:
     """
     總指揮代理。
     
     這個類別負責初始化所有核心組件，並將外部請求委託給適當的管理器處理。
+
+    一般任務的最終回答會以「正規化後的問題 + 完整的已清理歷史」為鍵快取
+    （與重寫、規劃讀取的歷史相同，相同問句在不同上下文下不會共用回答）；
+    重複或僅有空白、標點差異的問題在存活期間內直接回傳，不再經過重寫、規劃、
+    工具執行與綜合。元對話的回答不快取。
     """
     
     def __init__(self, 
@@ -21,7 +39,9 @@ class Orchestrator:
                  tool_executor: ToolExecutor, 
                  conversation_manager: ConversationManager, 
                  synthesis_generator: SynthesisGenerator,
-                 query_rewriter: QueryRewriter
+                 query_rewriter: QueryRewriter,
+                 answer_cache_size: int = 256,
+                 answer_cache_ttl: Optional[float] = 300.0
                  ):
         """
         初始化總指揮代理。
@@ -33,6 +53,8 @@ class Orchestrator:
             conversation_manager: 對話管理器。
             synthesis_generator: 綜合生成器。
             query_rewriter: 問句重寫器。
+            answer_cache_size: 最終回答快取的最大筆數，設為 0 表示停用。
+            answer_cache_ttl: 回答快取的存活秒數（工具資料如天氣會變動，預設 5 分鐘），None 表示不過期。
         """
         # 初始化各個核心組件
         self.prompt_manager = prompt_manager # 提示管理器
@@ -41,6 +63,38 @@ class Orchestrator:
         self.conversation_manager = conversation_manager # 對話管理器
         self.synthesis_generator = synthesis_generator # 綜合生成器
         self.query_rewriter = query_rewriter # 問句重寫器
+        # 元對話判斷與問句重寫彼此獨立，以此執行緒池並行發出兩個 LLM 請求
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="orchestrator")
+        self._answer_cache = ResponseCache(maxsize=answer_cache_size, ttl=answer_cache_ttl) # 問題與上下文雜湊 -> 回答
+
+    def _answer_cache_key(self, complex_question: str, sanitized_history: List[Dict[str, str]]) -> str:
+        """
+        計算最終回答的快取鍵：正規化後的問題加上完整的已清理歷史。
+        重寫與規劃會讀取整段歷史來理解問題，只取部分歷史會讓上下文不同的對話共用回答。
+
+        Args:
+            complex_question: str, 原始問題。
+            sanitized_history: List[Dict[str, str]], 已清理的對話歷史。
+
+        Returns:
+            str, 快取鍵。
+        """
+        return ResponseCache.make_key((_normalize_question(complex_question), sanitized_history))
+
+    def _remember_answer(self, cache_key: str, answer: str) -> str:
+        """
+        將非空回答寫入回答快取並原樣回傳。
+
+        Args:
+            cache_key: str, `_answer_cache_key` 計算的快取鍵。
+            answer: str, 回答。
+
+        Returns:
+            str, 傳入的回答。
+        """
+        if answer:
+            self._answer_cache.set(cache_key, answer)
+        return answer
 
     def aquery(self, complex_question: str) -> str:
         """
@@ -64,6 +118,11 @@ class Orchestrator:
         if not isinstance(complex_question, str):
             raise ValueError("complex_question must be a string")
         
+        cache_key = self._answer_cache_key(complex_question, [])
+        cached_answer = self._answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return cached_answer
+
         # 重寫問句
         rewritten_question = self.query_rewriter.rewrite_query(history=[], query=complex_question)
         # 計畫執行時需要的工具
@@ -74,7 +133,7 @@ class Orchestrator:
         # 綜合結果
         synthesis = self.synthesis_generator.synthesize_result(complex_question, results, used_tools)
         # 回傳結果
-        return synthesis
+        return self._remember_answer(cache_key, synthesis)
     
     def aquery_with_history(self, 
                             complex_question: str, 
@@ -104,20 +163,158 @@ class Orchestrator:
         
         # 歷史清理（避免前端傳入雜訊）
         sanitized_history = self.conversation_manager.sanitize_history(history or [], max_items=20)
+        cache_key = self._answer_cache_key(complex_question, sanitized_history)
+        cached_answer = self._answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return cached_answer
 
-        # 若為元對話，直接路由處理
-        if self.conversation_manager.is_meta_question(complex_question, sanitized_history):
+        # 元對話判斷與問句重寫並行；若為元對話，直接路由處理
+        rewritten_question = self._classify_and_rewrite(complex_question, sanitized_history)
+        if rewritten_question is None:
             return self.conversation_manager.handle_meta_conversation(complex_question, sanitized_history)
 
-        # 一般任務流程：重寫問句 → 規劃
-        rewritten_question = self.query_rewriter.rewrite_query(sanitized_history, complex_question)
+        # 一般任務流程：規劃 → 執行 → 綜合
+        answer = self._answer_rewritten(complex_question, rewritten_question, sanitized_history)
+        return self._remember_answer(cache_key, answer)
+
+    async def aquery_with_history_async(self,
+                                        complex_question: str,
+                                        history: Optional[List[Dict[str, str]]] = None
+                                        ) -> str:
+        """
+        `aquery_with_history` 的非同步版本，供已在事件迴圈中執行的呼叫端使用。
+
+        元對話判斷與問句重寫以原生非同步 LLM 呼叫同時發出（asyncio.gather），
+        工具以 `ToolExecutor.execute_plan_async` 並行執行；規劃與綜合在工作執行緒中
+        進行，不阻塞事件迴圈。LLM 客戶端依事件迴圈各自建立非同步連線池，
+        可在不同的 asyncio.run() 中重複呼叫。
+
+        Args:
+            complex_question: str, 複雜查詢。
+            history: Optional[List[Dict[str, str]]], 對話歷史。
+
+        Returns:
+            回答。
+
+        Examples:
+            >>> orchestrator = Orchestrator(prompt_manager, planning_manager, tool_executor, conversation_manager, synthesis_generator, query_rewriter)
+            >>> await orchestrator.aquery_with_history_async("今天適合出門嗎？")
+            "今天適合出門，氣溫攝氏25度。"
+
+        Exceptions:
+            ValueError: 複雜查詢為空。
+        """
+        if not isinstance(complex_question, str):
+            raise ValueError("complex_question must be a string")
+
+        sanitized_history = self.conversation_manager.sanitize_history(history or [], max_items=20)
+        cache_key = self._answer_cache_key(complex_question, sanitized_history)
+        cached_answer = self._answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return cached_answer
+
+        is_meta, rewritten_question = await asyncio.gather(
+            self.conversation_manager.is_meta_question_async(complex_question, sanitized_history),
+            self.query_rewriter.rewrite_query_async(sanitized_history, complex_question),
+        )
+        if is_meta:
+            return await self.conversation_manager.handle_meta_conversation_async(complex_question, sanitized_history)
+
+        execution_plan = await asyncio.to_thread(self.planning_manager.plan_question, rewritten_question, sanitized_history)
+        # 執行工具（以 asyncio.gather 並行）
+        results = await self.tool_executor.execute_plan_async(execution_plan)
+        used_tools = [item.tool_name for item in execution_plan.plan_items]
+        # 綜合結果
+        answer = await asyncio.to_thread(self.synthesis_generator.synthesize_result, complex_question, results, used_tools)
+        return self._remember_answer(cache_key, answer)
+
+    def _classify_and_rewrite(self,
+                              complex_question: str,
+                              sanitized_history: List[Dict[str, str]]) -> Optional[str]:
+        """
+        並行執行元對話判斷與問句重寫，讓兩次 LLM 往返的延遲重疊。
+
+        元對話時重寫結果會被捨棄（多一次 LLM 請求），換取一般任務少等一次往返。
+
+        Args:
+            complex_question: str, 複雜查詢。
+            sanitized_history: List[Dict[str, str]], 已清理的對話歷史。
+
+        Returns:
+            Optional[str], 重寫後的問題；若為元對話則為 None。
+        """
+        rewrite_future = self._executor.submit(self.query_rewriter.rewrite_query, sanitized_history, complex_question)
+        if self.conversation_manager.is_meta_question(complex_question, sanitized_history):
+            rewrite_future.cancel()
+            return None
+        return rewrite_future.result()
+
+    def aquery_batch(self,
+                     questions: List[str],
+                     history: Optional[List[Dict[str, str]]] = None
+                     ) -> List[str]:
+        """
+        批次處理多個彼此獨立的問題。
+
+        所有問題的重寫合併為一次 LLM 請求；之後各問題的規劃、工具執行與綜合
+        以執行緒並行，讓推論端可將同時到達的請求合併批次處理。
+
+        Args:
+            questions: List[str], 彼此獨立的問題列表。
+            history: Optional[List[Dict[str, str]]], 所有問題共用的對話歷史。
+
+        Returns:
+            List[str], 與 `questions` 順序對應的回答。
+
+        Examples:
+            >>> orchestrator = Orchestrator(prompt_manager, planning_manager, tool_executor, conversation_manager, synthesis_generator, query_rewriter)
+            >>> orchestrator.aquery_batch(["台北天氣如何？", "台中天氣如何？"])
+            ["台北市今天晴朗...", "台中市今天多雲..."]
+
+        Exceptions:
+            ValueError: questions 不是字串列表。
+        """
+        if not isinstance(questions, list) or not all(isinstance(q, str) for q in questions):
+            raise ValueError("questions must be a list of strings")
+        if not questions:
+            return []
+
+        sanitized_history = self.conversation_manager.sanitize_history(history or [], max_items=20)
+        rewritten_questions = self.query_rewriter.rewrite_query_batch(sanitized_history, questions)
+
+        def answer(question: str, rewritten_question: str) -> str:
+            cache_key = self._answer_cache_key(question, sanitized_history)
+            cached_answer = self._answer_cache.get(cache_key)
+            if cached_answer is not None:
+                return cached_answer
+            if self.conversation_manager.is_meta_question(question, sanitized_history):
+                return self.conversation_manager.handle_meta_conversation(question, sanitized_history)
+            return self._remember_answer(cache_key, self._answer_rewritten(question, rewritten_question, sanitized_history))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(questions), 5)) as executor:
+            return list(executor.map(answer, questions, rewritten_questions))
+
+    def _answer_rewritten(self,
+                          complex_question: str,
+                          rewritten_question: str,
+                          sanitized_history: List[Dict[str, str]]) -> str:
+        """
+        依重寫後的問句規劃、執行工具並綜合回答。
+
+        Args:
+            complex_question: str, 原始問題（用於綜合回答）。
+            rewritten_question: str, 重寫後的問題（用於規劃）。
+            sanitized_history: List[Dict[str, str]], 已清理的對話歷史。
+
+        Returns:
+            回答。
+        """
         execution_plan = self.planning_manager.plan_question(rewritten_question, sanitized_history)
         # 執行工具
         results = self.tool_executor.execute_plan(execution_plan)
         used_tools = [item.tool_name for item in execution_plan.plan_items]
         # 綜合結果
-        synthesis = self.synthesis_generator.synthesize_result(complex_question, results, used_tools)
-        return synthesis
+        return self.synthesis_generator.synthesize_result(complex_question, results, used_tools)
     
     def get_reasoning_history(self):
         """
@@ -144,6 +341,60 @@ class Orchestrator:
         """
         self.conversation_manager.clear_reasoning_history()
 
+    def clear_response_caches(self) -> None:
+        """
+        清空各階段的回應快取：最終回答、問句重寫、綜合回答，以及各組件 LLM 客戶端的
+        completion 快取（例如低溫度的元對話分類結果）。
+
+        Examples:
+            >>> orchestrator = Orchestrator(prompt_manager, planning_manager, tool_executor, conversation_manager, synthesis_generator, query_rewriter)
+            >>> orchestrator.clear_response_caches()
+        """
+        self._answer_cache.clear()
+        self.query_rewriter.clear_cache()
+        self.synthesis_generator.clear_cache()
+        for llm_client in self._llm_clients():
+            clear_cache = getattr(llm_client, "clear_cache", None)
+            if callable(clear_cache):
+                clear_cache()
+
+    def close(self) -> None:
+        """
+        釋放資源：關閉內部執行緒池、工具執行器的執行緒池與各組件的 LLM 客戶端。
+        重複呼叫將被忽略；亦可以 with 陳述式使用，離開區塊時自動關閉。
+
+        Examples:
+            >>> with Orchestrator(prompt_manager, planning_manager, tool_executor, conversation_manager, synthesis_generator, query_rewriter) as orchestrator:
+            ...     orchestrator.aquery("今天天氣如何？")
+        """
+        self._executor.shutdown(wait=True)
+        for component in (self.tool_executor, *self._llm_clients()):
+            close = getattr(component, "close", None)
+            if callable(close):
+                close()
+
+    def __enter__(self) -> "Orchestrator":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+    def _llm_clients(self) -> List[object]:
+        """
+        取得各組件使用的 LLM 客戶端（同一實例只列一次）。
+
+        Returns:
+            List[object], LLM 客戶端列表。
+        """
+        clients = {}
+        for component in (self.query_rewriter, self.planning_manager,
+                          self.conversation_manager, self.synthesis_generator):
+            llm_client = getattr(component, "llm_client", None)
+            if llm_client is not None:
+                clients.setdefault(id(llm_client), llm_client)
+        return list(clients.values())
+
     def aquery_with_history_stream(self, 
                                    complex_question: str, 
                                    history: Optional[List[Dict[str, str]]] = None):
@@ -162,17 +413,20 @@ class Orchestrator:
         
         # 歷史清理（避免前端傳入雜訊）
         sanitized_history = self.conversation_manager.sanitize_history(history or [], max_items=20)
+        cache_key = self._answer_cache_key(complex_question, sanitized_history)
+        cached_answer = self._answer_cache.get(cache_key)
+        if cached_answer is not None:
+            yield cached_answer
+            return
 
-        # 若為元對話，直接路由處理（不支援串流）
-        if self.conversation_manager.is_meta_question(complex_question, sanitized_history):
+        # 元對話判斷與問句重寫並行；若為元對話，直接路由處理（不支援串流）
+        rewritten_question = self._classify_and_rewrite(complex_question, sanitized_history)
+        if rewritten_question is None:
             yield self.conversation_manager.handle_meta_conversation(complex_question, sanitized_history)
             return
 
-        # 一般任務流程：重寫問句 → 規劃
-        yield "🔄 正在分析您的問題..."
-        rewritten_question = self.query_rewriter.rewrite_query(sanitized_history, complex_question)
-        
-        yield " 完成\n🔄 正在制定執行計畫..."
+        # 一般任務流程：規劃 → 執行 → 綜合
+        yield "🔄 正在分析您的問題... 完成\n🔄 正在制定執行計畫..."
         execution_plan = self.planning_manager.plan_question(rewritten_question, sanitized_history)
         
         # 執行工具
@@ -186,5 +440,9 @@ class Orchestrator:
             used_tools = []
             yield " 完成\n\n"
         
-        # 綜合結果（串流版本）
-        yield from self.synthesis_generator.synthesize_result_stream(complex_question, results, used_tools)
+        # 綜合結果（串流版本）；串流完整結束後才寫入回答快取
+        parts = []
+        for chunk in self.synthesis_generator.synthesize_result_stream(complex_question, results, used_tools):
+            parts.append(chunk)
+            yield chunk
+        self._remember_answer(cache_key, "".join(parts))
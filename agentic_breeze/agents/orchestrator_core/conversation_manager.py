@@ -3,6 +3,9 @@ from typing import List, Dict, Optional
 
 from ...llm.llm_client import LLMConnector
 
+# 元對話判斷只需輸出 META 或 TASK，限制生成長度，不必等模型產生多餘內容
+_META_LABEL_MAX_TOKENS = 8
+
 
 class ConversationManager:
     """
@@ -31,18 +34,24 @@ class ConversationManager:
         - 僅保留 role in {user, assistant}
         - 轉字串、去除空白；空內容移除
         - 僅保留最後 max_items 筆
+
+        由最新一筆往回走訪，收滿 max_items 筆即停止，較早的訊息不做轉換與配置。
         """
-        history = history or []
         cleaned: List[Dict[str, str]] = []
-        for m in history:
-            role = str(m.get("role", "")).lower()
+        if max_items <= 0:
+            return cleaned
+        for m in reversed(history or []):
             content = str(m.get("content", "")).strip()
             if not content:
                 continue
-            role = "user" if role == "user" else "assistant"
+            role = m.get("role")
+            # 前端多半已傳入標準角色名稱，只有其他寫法才轉字串並轉小寫比對
+            if role != "user" and role != "assistant":
+                role = "user" if str(role).lower() == "user" else "assistant"
             cleaned.append({"role": role, "content": content})
-        if len(cleaned) > max_items:
-            cleaned = cleaned[-max_items:]
+            if len(cleaned) == max_items:
+                break
+        cleaned.reverse()
         return cleaned
 
     def is_meta_question(self, question: str, history: Optional[List[Dict[str, str]]] = None) -> bool:
@@ -68,13 +77,45 @@ class ConversationManager:
             return False
         
         # 註解：原本的 LLM 判斷邏輯
-        prompt = (
+        # 貪婪解碼讓相同問題得到相同標籤，並可命中 LLMConnector 的回應快取
+        label = (self.llm_client.single_query(
+            self._meta_prompt(q), max_tokens=_META_LABEL_MAX_TOKENS, temperature=0.0) or "").strip().upper()
+        return label.startswith("META")
+
+    async def is_meta_question_async(self, question: str, history: Optional[List[Dict[str, str]]] = None) -> bool:
+        """
+        `is_meta_question` 的非同步版本，可與其他 LLM 呼叫並行。
+
+        Args:
+            question: str, 使用者問題。
+            history: Optional[List[Dict[str, str]]], 對話歷史。
+
+        Returns:
+            bool, 是否為元對話。
+        """
+        q = (question or "").strip()
+        if not q:
+            return False
+        label = (await self.llm_client.single_query_async(
+            self._meta_prompt(q), max_tokens=_META_LABEL_MAX_TOKENS, temperature=0.0) or "").strip().upper()
+        return label.startswith("META")
+
+    @staticmethod
+    def _meta_prompt(question: str) -> str:
+        """
+        構建元對話判斷的提示詞。
+
+        Args:
+            question: str, 已去除前後空白的使用者問題。
+
+        Returns:
+            str, 要求 LLM 只輸出 META 或 TASK 的提示詞。
+        """
+        return (
             "請判斷以下問題是否屬於元對話（關於助理/對話/說明/摘要/重述）。\n"
             "只輸出一個詞：META 或 TASK。\n"
-            f"問題：{q}"
+            f"問題：{question}"
         )
-        label = (self.llm_client.single_query(prompt) or "").strip().upper()
-        return label.startswith("META")
 
     def clarify_question_with_history(self, question: str, 
                                      history: List[Dict[str, str]]) -> str:
@@ -129,6 +170,20 @@ class ConversationManager:
         final_answer = (self.llm_client.chat_with_history(meta_messages) or "").strip()
         return final_answer
 
+    async def handle_meta_conversation_async(self, complex_question: str, history: List[Dict[str, str]]) -> str:
+        """
+        `handle_meta_conversation` 的非同步版本。
+
+        Args:
+            complex_question: str, 複雜問題。
+            history: List[Dict[str, str]], 對話歷史。
+
+        Returns:
+            str, LLM 生成的回應。
+        """
+        meta_messages: List[Dict[str, str]] = [*(history or []), {"role": "user", "content": complex_question.strip()}]
+        return (await self.llm_client.chat_with_history_async(meta_messages) or "").strip()
+
     def get_reasoning_history(self) -> List[Dict[str, str]]:
         return list(self._reasoning_history)
 
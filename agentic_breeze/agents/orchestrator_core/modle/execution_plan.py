@@ -1,7 +1,7 @@
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import Tuple, Dict, Any
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlanItem:
     """
     執行計畫的單一步驟。
@@ -16,18 +16,22 @@ class PlanItem:
     tool_name: str
     arguments: Dict[str, Any]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExecutionPlan:
     """
     執行計畫。用於記錄並描述多個步驟的序列。
 
     屬性:
-        - plan_items (List[PlanItem]): 執行計畫的步驟。
+        - plan_items (Tuple[PlanItem, ...]): 執行計畫的步驟，建構時傳入的列表會轉為 tuple。
         - description (str): 執行計畫的描述。
 
     使用範例:
         >>> steps = [PlanItem(tool_name="wiki", arguments={"query":"台灣"})]
         >>> ExecutionPlan(plan_items=steps, description="資訊檢索與彙整")
     """
-    plan_items: List[PlanItem]
-    description: str
+    plan_items: Tuple[PlanItem, ...] = ()
+    description: str = ""
+
+    def __post_init__(self) -> None:
+        # frozen dataclass 需透過 object.__setattr__ 正規化欄位
+        object.__setattr__(self, "plan_items", tuple(self.plan_items))
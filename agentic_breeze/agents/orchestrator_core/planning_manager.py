@@ -1,5 +1,5 @@
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
 
 from ...llm.llm_client import LLMConnector
@@ -17,7 +17,10 @@ class PlanningManager:
     與實際執行解耦，提供清晰的職責分離。
     """
     
-    def __init__(self, llm_client: LLMConnector, tool_registry: ToolRegistry, prompt_manager: PromptManager):
+    def __init__(self,
+                 llm_client: LLMConnector,
+                 tool_registry: ToolRegistry,
+                 prompt_manager: PromptManager):
         """
         初始化規劃管理器。
         
@@ -36,6 +39,8 @@ class PlanningManager:
         self.llm_client = llm_client
         self.tool_registry = tool_registry
         self.prompt_manager = prompt_manager
+        # (登錄表版本, 規劃系統提示詞)；工具組合不變時直接重用，不再逐次組合
+        self._system_prompt_cache: Optional[Tuple[int, str]] = None
     
     def plan_question(self, question: str, history: Optional[List[Dict[str, str]]] = None) -> ExecutionPlan:
         """
@@ -71,8 +76,8 @@ class PlanningManager:
                 description="沒有可用工具"
             )
         
-        # 構建規劃提示詞
-        planning_prompt = self.prompt_manager.build_planning_prompt(question, tool_schemas)
+        # 構建規劃提示詞：系統提示詞只含固定的角色與工具清單，問題放在 user 訊息
+        planning_prompt = self._planning_system_prompt(tool_schemas)
         
         # 構建訊息列表
         messages = [{"role": "system", "content": planning_prompt}]
@@ -128,33 +133,52 @@ class PlanningManager:
                 if isinstance(tool_call, dict):
                     function_info = tool_call.get('function')
                     if function_info:
-                        try:
-                            # 檢查參數是否為字串需要解析，還是已經是字典
-                            arguments = function_info.get('arguments', {})
-                            if isinstance(arguments, str):
-                                arguments = json.loads(arguments)
-                            elif not isinstance(arguments, dict):
-                                arguments = {}
-                        except (json.JSONDecodeError, TypeError):
-                            arguments = {}
-                        
                         plan_items.append(PlanItem(
                             tool_name=function_info.get('name'),
-                            arguments=arguments
+                            arguments=self._coerce_arguments(function_info.get('arguments'))
                         ))
                 # 處理對象格式的 tool_call（保持向後兼容）
                 elif hasattr(tool_call, 'function'):
-                    try:
-                        # 解析 JSON 字串為字典
-                        arguments = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError:
-                        # 如果解析失敗，則參數為空字典
-                        arguments = {}
-                    
                     plan_items.append(PlanItem(
                         tool_name=tool_call.function.name,
-                        arguments=arguments
+                        arguments=self._coerce_arguments(tool_call.function.arguments)
                     ))
         
         return plan_items
-    
+
+    @staticmethod
+    def _coerce_arguments(arguments: Any) -> Dict[str, Any]:
+        """
+        將工具參數統一轉為字典，於規劃時只解析一次；執行時直接以 **arguments 傳入。
+
+        Args:
+            arguments: Any, LLM 回傳的參數（JSON 字串或已解析的字典）。
+
+        Returns:
+            Dict[str, Any]: 參數字典；無法解析或不是物件時為空字典。
+        """
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except json.JSONDecodeError:
+                return {}
+        return arguments if isinstance(arguments, dict) else {}
+
+    def _planning_system_prompt(self, tool_schemas: List[Dict[str, Any]]) -> str:
+        """
+        取得規劃系統提示詞；登錄表版本未變時回傳先前組合的字串。
+
+        Args:
+            tool_schemas: List[Dict[str, Any]], 目前登錄表的工具 schema。
+
+        Returns:
+            str: 規劃系統提示詞。
+        """
+        version = self.tool_registry.version
+        cached = self._system_prompt_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        planning_prompt = self.prompt_manager.build_planning_system_prompt(tool_schemas)
+        # 以單一 tuple 指派替換，並行讀取的執行緒不會看到版本與內容不一致
+        self._system_prompt_cache = (version, planning_prompt)
+        return planning_prompt
@@ -1,30 +1,66 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+import re
 
 from ...llm.llm_client import LLMConnector
+from ...llm.response_cache import PersistentCacheStore, ResponseCache
 from ...prompts.prompt_manager import PromptManager
 
+# 批次重寫回應中以 [idx=編號] 開頭的各段答案
+_BATCH_ANSWER_PATTERN = re.compile(r"^\[idx=(\d+)\]\s*(.+?)(?=^\[idx=|\Z)", re.DOTALL | re.MULTILINE)
+# 指涉前文的代詞與承接語；出現時問句需要上下文才能理解，必須交給 LLM 重寫
+_ANAPHORA_PATTERN = re.compile(r"它|他|她|牠|那|這|这|再|呢|該|此|上述|剛才|同樣|also|too", re.IGNORECASE)
+# 無對話歷史時，短於此長度且不含指涉詞的問句視為已足夠明確，不呼叫 LLM 重寫
+_TRIVIAL_QUERY_MAX_CHARS = 40
+
 class QueryRewriter:
     """
     問句重寫器。用於重寫複雜問句，使其更符合查詢需求。
 
+    相同的重寫提示詞（相同歷史與問句）會命中行程內的回應快取，不再呼叫 LLM。
+    沒有對話歷史的簡短問句（不含代詞等指涉前文的字詞）直接沿用原句，不呼叫 LLM。
+
     Attributes:
         llm_client: LLMConnector，用於向LLM發出請求。    
         prompt_manager: PromptManager，用於管理提示詞。
 
     Methods:
         rewrite_query(query: str) -> str: 重寫問句。
+        rewrite_query_batch(queries: List[str]) -> List[str]: 以單次 LLM 呼叫重寫多個獨立問句。
     """
     
-    def __init__(self, llm_client: LLMConnector, prompt_manager: PromptManager):
+    def __init__(self,
+                 llm_client: LLMConnector,
+                 prompt_manager: PromptManager,
+                 cache_size: int = 1024,
+                 cache_ttl: Optional[float] = None,
+                 cache_store: Optional[PersistentCacheStore] = None):
         """
         初始化問句重寫器。
 
         Args:
             llm_client: LLMConnector，用於向LLM發出請求。
             prompt_manager: PromptManager，用於管理提示詞。
+            cache_size: 回應快取的最大筆數，設為 0 表示停用快取。
+            cache_ttl: 快取項目的存活秒數，None 表示不過期。
+            cache_store: 選用的磁碟快取，讓重寫結果跨重啟與行程共用。
         """
         self.llm_client = llm_client # LLMConnector，用於向LLM發出請求。
         self.prompt_manager = prompt_manager # PromptManager，用於管理提示詞。
+        self._cache = ResponseCache(maxsize=cache_size, ttl=cache_ttl, store=cache_store) # 重寫提示詞雜湊 -> 重寫結果
+
+    @staticmethod
+    def _needs_rewrite(history: List[Dict[str, str]], query: str) -> bool:
+        """
+        判斷問句是否需要交給 LLM 重寫。
+
+        Args:
+            history: List[Dict[str, str]], 對話歷史。
+            query: str, 原始問句。
+
+        Returns:
+            bool, 有對話歷史、問句較長或含指涉前文的字詞時為 True。
+        """
+        return bool(history) or len(query) >= _TRIVIAL_QUERY_MAX_CHARS or _ANAPHORA_PATTERN.search(query) is not None
 
     def rewrite_query(self, history: List[Dict[str, str]], query: str) -> str:
         """
@@ -42,11 +78,100 @@ class QueryRewriter:
             >>> query_rewriter.rewrite_query([{"role": "user", "content": "今天天氣如何？"}, {"role": "assistant", "content": "今天天氣晴朗，氣溫攝氏25度。"}], "今天適合出門嗎？")
             "今天的天氣與氣溫適合出門嗎？"
         """
+        if not self._needs_rewrite(history, query):
+            return query.strip()
+
         prompt = self.prompt_manager.build_query_rewriter_prompt(history, query)
+        cache_key = ResponseCache.make_key(prompt)
+        cached_query = self._cache.get(cache_key)
+        if cached_query is not None:
+            return cached_query
+
         rewritten_query = self.llm_client.single_query(prompt)
 
+        if not rewritten_query or rewritten_query.strip() == "":
+            # 空回應不寫入快取，避免把暫時性失敗固定下來
+            return query
+
+        self._cache.set(cache_key, rewritten_query)
+        return rewritten_query
+
+    async def rewrite_query_async(self, history: List[Dict[str, str]], query: str) -> str:
+        """
+        `rewrite_query` 的非同步版本，與同步版本共用回應快取。
+
+        Args:
+            history: List[Dict[str, str]], 對話歷史。
+            query: str, 複雜問句。
+
+        Returns:
+            str, 重寫後的問句。
+        """
+        if not self._needs_rewrite(history, query):
+            return query.strip()
+
+        prompt = self.prompt_manager.build_query_rewriter_prompt(history, query)
+        cache_key = ResponseCache.make_key(prompt)
+        cached_query = self._cache.get(cache_key)
+        if cached_query is not None:
+            return cached_query
+
+        rewritten_query = await self.llm_client.single_query_async(prompt)
+
         if not rewritten_query or rewritten_query.strip() == "":
             return query
 
+        self._cache.set(cache_key, rewritten_query)
         return rewritten_query
-        
+
+    def clear_cache(self) -> None:
+        """
+        清空重寫結果快取。
+
+        Examples:
+            >>> query_rewriter = QueryRewriter(llm_client, prompt_manager)
+            >>> query_rewriter.clear_cache()
+        """
+        self._cache.clear()
+
+    def rewrite_query_batch(self, history: List[Dict[str, str]], queries: List[str]) -> List[str]:
+        """
+        批次重寫多個獨立問句，只發出一次 LLM 請求。
+
+        回應中缺漏或無法解析的問句保留原文，與 `rewrite_query` 在空回應時的行為一致；
+        不需重寫的簡短問句不放入批次提示詞。
+
+        Args:
+            history: List[Dict[str, str]], 對話歷史。
+            queries: List[str], 複雜問句列表。
+
+        Returns:
+            List[str], 與 `queries` 順序對應的重寫後問句。
+
+        Examples:
+            >>> query_rewriter = QueryRewriter(llm_client, prompt_manager)
+            >>> query_rewriter.rewrite_query_batch([], ["台北天氣？", "台中天氣？"])
+            ["台北市今天的天氣如何？", "台中市今天的天氣如何？"]
+        """
+        rewritten_queries = list(queries)
+        pending = []
+        for i, query in enumerate(queries):
+            if self._needs_rewrite(history, query):
+                pending.append(i)
+            else:
+                rewritten_queries[i] = query.strip()
+        if not pending:
+            return rewritten_queries
+        if len(pending) == 1:
+            rewritten_queries[pending[0]] = self.rewrite_query(history, queries[pending[0]])
+            return rewritten_queries
+
+        prompt = self.prompt_manager.build_query_rewriter_batch_prompt(history, [queries[i] for i in pending])
+        response = self.llm_client.single_query(prompt)
+
+        for match in _BATCH_ANSWER_PATTERN.finditer(response or ""):
+            index = int(match.group(1)) - 1
+            rewritten_query = match.group(2).strip()
+            if 0 <= index < len(pending) and rewritten_query:
+                rewritten_queries[pending[index]] = rewritten_query
+        return rewritten_queries
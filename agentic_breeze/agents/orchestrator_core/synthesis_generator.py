@@ -1,6 +1,8 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
+import functools
 
 from ...llm.llm_client import LLMConnector
+from ...llm.response_cache import PersistentCacheStore, ResponseCache
 from ...prompts.prompt_manager import PromptManager
 
 
@@ -10,31 +12,48 @@ class SynthesisGenerator:
     
     這個類別專門處理多個工具執行結果的整合和綜合，
     使用 LLM 生成符合使用者期望的完整回答。
+
+    相同的綜合提示詞會命中行程內的回應快取（LRU，可設定 TTL），
+    直接回傳先前的回答而不再呼叫 LLM；設定磁碟快取後，重新啟動或其他行程也能命中。
     """
     
-    def __init__(self, llm_client: LLMConnector, prompt_manager: PromptManager):
+    def __init__(self,
+                 llm_client: LLMConnector,
+                 prompt_manager: PromptManager,
+                 cache_size: int = 1024,
+                 cache_ttl: Optional[float] = None,
+                 cache_store: Optional[PersistentCacheStore] = None) -> None:
         """
         初始化綜合生成器。
         
         Args:
             llm_client: LLM 客戶端，用於生成綜合回答
             prompt_manager: 提示詞管理器，用於構建綜合提示詞
+            cache_size: 回應快取的最大筆數，設為 0 表示停用快取
+            cache_ttl: 快取項目的存活秒數，None 表示不過期
+            cache_store: 選用的磁碟快取，記憶體未命中時改查磁碟
             
         Raises:
             TypeError: 如果參數類型不正確
         """
-        if not isinstance(llm_client, LLMConnector):
-            raise TypeError("llm_client must be an instance of LLMConnector")
-        if not isinstance(prompt_manager, PromptManager):
-            raise TypeError("prompt_manager must be an instance of PromptManager")
+        # 以所需方法檢查取代 isinstance，允許相容介面（例如測試替身）傳入
+        for attr in ("single_query", "single_query_stream"):
+            if not callable(getattr(llm_client, attr, None)):
+                raise TypeError(f"llm_client must provide a callable '{attr}' like LLMConnector")
+        if not callable(getattr(prompt_manager, "build_synthesis_prompt", None)):
+            raise TypeError("prompt_manager must provide a callable 'build_synthesis_prompt' like PromptManager")
         
         self.llm_client = llm_client
         self.prompt_manager = prompt_manager
+        self._cache = ResponseCache(maxsize=cache_size, ttl=cache_ttl, store=cache_store) # 綜合提示詞雜湊 -> 回答
+        # 每個實例各自的提示詞記憶化，synthesize_result 與串流版本共用
+        self._build_prompt = functools.lru_cache(maxsize=64)(self._build_prompt_uncached)
     
     def synthesize_result(self, 
                          original_question: str,
                          execution_results: List[str],
-                         used_tools: Optional[List[str]] = None) -> str:
+                         used_tools: Optional[List[str]] = None,
+                         cache_ttl: Optional[float] = None) -> str:
         """
         綜合工具執行結果並生成最終回答。
         
@@ -42,6 +61,7 @@ class SynthesisGenerator:
             original_question: str, 原始使用者問題
             execution_results: List[str], 工具執行結果列表
             used_tools: Optional[List[str]], 實際執行過的工具名稱列表 (用於組合專業提示詞)。
+            cache_ttl: Optional[float], 本次查詢快取時採用的存活秒數，覆寫初始化時的設定。
             
         Returns:
             str: 綜合後的最終回答
@@ -64,19 +84,55 @@ class SynthesisGenerator:
             raise ValueError("execution_results must be a list")
         
         # 建構綜合提示詞
-        synthesis_prompt = self.prompt_manager.build_synthesis_prompt(
-            original_question=original_question,
-            execution_results=execution_results,
-            used_tools=used_tools
-        )
+        synthesis_prompt = self._build_prompt(original_question, tuple(execution_results), tuple(used_tools or ()))
+        
+        cache_key = ResponseCache.make_key(synthesis_prompt)
+        cached_answer = self._cache.get(cache_key, cache_ttl)
+        if cached_answer is not None:
+            return cached_answer
         
         final_answer = self.llm_client.single_query(synthesis_prompt)
+        # 空回答不寫入快取，避免把暫時性失敗固定下來
+        if final_answer:
+            self._cache.set(cache_key, final_answer)
         return final_answer
 
+    def clear_cache(self) -> None:
+        """
+        清空回應快取（含磁碟快取）與提示詞記憶化快取。
+
+        Examples:
+            >>> generator = SynthesisGenerator(llm_client, prompt_manager)
+            >>> generator.clear_cache()
+        """
+        self._cache.clear()
+        self._build_prompt.cache_clear()
+
+    def _build_prompt_uncached(self,
+                               original_question: str,
+                               execution_results: Tuple[str, ...],
+                               used_tools: Tuple[str, ...]) -> str:
+        """
+        建構綜合提示詞。參數皆為可雜湊型別，以便透過 lru_cache 記憶化。
+
+        Args:
+            original_question: str, 原始使用者問題
+            execution_results: Tuple[str, ...], 工具執行結果
+            used_tools: Tuple[str, ...], 實際執行過的工具名稱
+
+        Returns:
+            str: 綜合提示詞
+        """
+        return self.prompt_manager.build_synthesis_prompt(
+            original_question=original_question,
+            execution_results=list(execution_results),
+            used_tools=list(used_tools)
+        )
+
     def synthesize_result_stream(self, 
                                 original_question: str,
                                 execution_results: List[str],
-                                used_tools: Optional[List[str]] = None):
+                                used_tools: Optional[List[str]] = None) -> Iterator[str]:
         """
         綜合工具執行結果並生成串流回答。
         
@@ -99,15 +155,39 @@ class SynthesisGenerator:
             raise ValueError("execution_results must be a list")
         
         # 建構綜合提示詞
-        synthesis_prompt = self.prompt_manager.build_synthesis_prompt(
-            original_question=original_question,
-            execution_results=execution_results,
-            used_tools=used_tools
-        )
+        synthesis_prompt = self._build_prompt(original_question, tuple(execution_results), tuple(used_tools or ()))
         
         # 使用串流方法
         stream = self.llm_client.single_query_stream(synthesis_prompt)
         for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            # 每個 chunk 只取一次 choices，省去重複的屬性查找
+            choices = chunk.choices
+            if not choices:
+                continue
+            content = choices[0].delta.content
+            if content:
+                yield content
+
+    def synthesize_result_collect(self, 
+                                  original_question: str,
+                                  execution_results: List[str],
+                                  used_tools: Optional[List[str]] = None) -> str:
+        """
+        以串流方式綜合結果，並將所有片段一次合併為完整回答。
+
+        以 list 收集片段再 "".join，避免逐段 += 造成的重複字串複製。
+        
+        Args:
+            original_question: str, 原始使用者問題
+            execution_results: List[str], 工具執行結果列表
+            used_tools: Optional[List[str]], 實際執行過的工具名稱列表
+            
+        Returns:
+            str: 綜合後的最終回答
+            
+        Examples:
+            >>> generator = SynthesisGenerator(llm_client, prompt_manager)
+            >>> answer = generator.synthesize_result_collect("今天天氣如何？", ["台北市晴朗，氣溫25°C"])
+        """
+        return "".join(self.synthesize_result_stream(original_question, execution_results, used_tools))
             
@@ -1,10 +1,14 @@
 
 from typing import List
+import asyncio
 import concurrent.futures
+import logging
 
 from ...registry.tool_registry import ToolRegistry
 from .modle.execution_plan import ExecutionPlan, PlanItem
 
+_logger = logging.getLogger(__name__)
+
 
 class ToolExecutor:
     """
@@ -12,19 +16,31 @@ class ToolExecutor:
     
     這個類別專門處理工具的實際執行邏輯，
     包括並行處理、錯誤處理和結果收集。
+
+    執行緒池於初始化時建立並跨呼叫重用，不必每次執行計畫都建立與回收執行緒；
+    結束時可呼叫 close() 釋放。
     """
     
-    def __init__(self, tool_registry: ToolRegistry):
+    def __init__(self, tool_registry: ToolRegistry, max_workers: int = 5):
         """
         初始化工具執行器。
         
         Args:
             tool_registry: 工具註冊表，用於執行具體工具
+            max_workers: 並行執行工具的工作執行緒數
         """
         if not isinstance(tool_registry, ToolRegistry):
             raise TypeError("tool_registry must be an instance of ToolRegistry")
         
         self.tool_registry = tool_registry
+        # 執行緒依需求建立，閒置時保留供之後的計畫重用
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-exec")
+
+    def close(self) -> None:
+        """
+        關閉執行緒池；已提交的工具會執行完畢。重複呼叫將被忽略。
+        """
+        self._pool.shutdown(wait=True)
     
     def execute_plan(self, execution_plan: ExecutionPlan) -> List[str]:
         """
@@ -39,24 +55,64 @@ class ToolExecutor:
         Raises:
             RuntimeError: 如果執行過程出現嚴重錯誤
         """
+        plan_items = execution_plan.plan_items
+        if not plan_items:
+            return []
+        
+        # 只有一個工具時沒有可並行的工作，直接在目前執行緒執行，省去執行緒交接
+        if len(plan_items) == 1:
+            return [self._execute_single_tool(plan_items[0], 0)]
+        
+        # 提交所有工具執行任務
+        futures = [
+            self._pool.submit(self._execute_single_tool, plan_item, i)
+            for i, plan_item in enumerate(plan_items)
+        ]
+        
+        # 依計畫順序收集所有結果
+        return [future.result() for future in futures]
+    
+    async def execute_plan_async(self, execution_plan: ExecutionPlan) -> List[str]:
+        """
+        非同步執行計畫中的所有工具調用，以 asyncio.gather 並行並保持計畫順序。
+        
+        Args:
+            execution_plan: 要執行的計畫
+            
+        Returns:
+            List[str]: 所有工具執行的結果列表，順序與計畫項目一致
+        """
         if not execution_plan.plan_items:
             return []
         
-        execution_results = []
+        return list(await asyncio.gather(*(
+            self._execute_single_tool_async(plan_item, i)
+            for i, plan_item in enumerate(execution_plan.plan_items)
+        )))
+    
+    async def _execute_single_tool_async(self, plan_item: PlanItem, index: int) -> str:
+        """
+        `_execute_single_tool` 的非同步版本，透過 `ToolRegistry.execute_tool_async` 執行。
         
-        # 這裡設定為5個工作執行緒進行並行處理
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # 提交所有工具執行任務
-            futures = [
-                executor.submit(self._execute_single_tool, plan_item, i)
-                for i, plan_item in enumerate(execution_plan.plan_items)
-            ]
+        Args:
+            plan_item: 單一工具調用的計畫項目
+            index: 工具在計畫中的索引，用於日誌記錄
             
-            # 收集所有結果
-            for future in futures:
-                execution_results.append(future.result())
-                
-        return execution_results
+        Returns:
+            str: 工具執行的結果字串，或錯誤訊息
+        """
+        tool_name = plan_item.tool_name
+        parameters = plan_item.arguments
+        
+        _logger.debug("執行工具 %d: %s 參數: %s", index + 1, tool_name, parameters)
+        
+        if not tool_name:
+            return "錯誤: 工具名稱缺失"
+        
+        result = await self.tool_registry.execute_tool_async(tool_name, **parameters)
+        _logger.debug("工具 %d 執行結果: %.100s...", index + 1, result)
+        
+        return result
     
     def _execute_single_tool(self, plan_item: PlanItem, index: int) -> str:
         """
@@ -73,14 +129,14 @@ class ToolExecutor:
         tool_name = plan_item.tool_name
         parameters = plan_item.arguments
         
-        print(f"執行工具 {index+1}: {tool_name} 參數: {parameters}")
+        # 以 %s 延遲格式化：未啟用 DEBUG 時不組字串、不寫 stdout，並行執行的工具不必爭用輸出鎖
+        _logger.debug("執行工具 %d: %s 參數: %s", index + 1, tool_name, parameters)
         
         if not tool_name:
-            error_msg = "工具名稱缺失"
             return "錯誤: 工具名稱缺失"
         
         # 透過 ToolRegistry 執行工具
         result = self.tool_registry.execute_tool(tool_name, **parameters)
-        print(f"工具 {index+1} 執行結果: {str(result)[:100]}...")
+        _logger.debug("工具 %d 執行結果: %.100s...", index + 1, result)
         
         return result
@@ -1,14 +1,139 @@
 import httpx
-from typing import Dict, Any, Optional, Literal
+from typing import Callable, Dict, Any, List, Optional, Literal, Tuple
+import asyncio
+import importlib.util
 import json
 import logging
+import threading
+from urllib.parse import urlsplit
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用相依套件，未安裝時退回 httpx 內建的 JSON 解析
+    orjson = None
+
+# httpx 的 HTTP/2 支援需要額外安裝 h2（httpx[http2]），未安裝時退回 HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 行程內共用的同步 client：相同設定的 APIRequestTool 共用同一個連線池與 TLS context，
+# 以參照計數管理，最後一個使用者 close() 時才真正關閉
+_shared_clients: Dict[Tuple[Any, ...], httpx.Client] = {}
+_shared_refcounts: Dict[Tuple[Any, ...], int] = {}
+_shared_lock = threading.Lock()
+
+# 代表下游限流或過載的狀態碼；收到時將該主機的並行上限減半
+_THROTTLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+# 逾時與連線失敗同樣代表下游過載，一併視為限流
+_THROTTLE_EXCEPTIONS = (httpx.TimeoutException, httpx.ConnectError)
+# 行程內各主機的自適應並行限制器，所有同步 APIRequestTool 共用
+_host_limiters: Dict[str, "AdaptiveConcurrencyLimiter"] = {}
+_host_limiters_lock = threading.Lock()
+
+
+def _acquire_shared_client(key: Tuple[Any, ...], **client_kwargs: Any) -> httpx.Client:
+    """
+    取得（必要時建立）指定設定的共用 httpx.Client，並增加參照計數。
+    """
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(**client_kwargs)
+            _shared_clients[key] = client
+            _shared_refcounts[key] = 0
+        _shared_refcounts[key] += 1
+        return client
+
+
+def _release_shared_client(key: Tuple[Any, ...]) -> None:
+    """
+    減少共用 client 的參照計數，歸零時關閉並移除。
+    """
+    with _shared_lock:
+        if key not in _shared_refcounts:
+            return
+        _shared_refcounts[key] -= 1
+        if _shared_refcounts[key] <= 0:
+            del _shared_refcounts[key]
+            _shared_clients.pop(key).close()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    以 AIMD（加法增、乘法減）調整同時進行中的請求上限。
+
+    初始上限即為 ceiling，未遭限流時不限制並行；收到限流回應時上限減半（最低 1），
+    之後每連續成功 success_threshold 次上限加 1，直到回到 ceiling。
+
+    使用範例:
+        >>> limiter = AdaptiveConcurrencyLimiter(ceiling=8)
+        >>> limiter.acquire()
+        >>> limiter.release(throttled=False)
+    """
+    def __init__(self, ceiling: int = 16, success_threshold: int = 5):
+        if ceiling < 1:
+            raise ValueError("ceiling must be a positive integer")
+        self.ceiling = ceiling
+        self.limit = ceiling # 目前允許的同時請求數
+        self._success_threshold = success_threshold
+        self._successes = 0 # 上次調整後連續成功的次數
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        等待直到進行中的請求數低於目前上限，再佔用一個名額。
+        """
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool) -> None:
+        """
+        釋放名額並依請求結果調整上限。
+
+        參數:
+            - throttled (bool): 此請求是否遭下游限流或過載。
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            elif self.limit < self.ceiling:
+                self._successes += 1
+                if self._successes >= self._success_threshold:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+def _limiter_for(url: str, ceiling: int) -> AdaptiveConcurrencyLimiter:
+    """
+    取得（必要時建立）目標主機的共用限制器；不同主機各自調整，互不影響。
+    """
+    host = urlsplit(url).netloc
+    limiter = _host_limiters.get(host)
+    if limiter is None:
+        with _host_limiters_lock:
+            limiter = _host_limiters.setdefault(host, AdaptiveConcurrencyLimiter(ceiling))
+    return limiter
+
 
 class APIRequestTool:
     """
     一個可重複使用的 API 請求工具，用於 AI Agent 發送 HTTP 請求。
     支援 GET, POST, PUT, DELETE 方法，並處理查詢參數、標頭和多種請求主體類型。
     """
-    def __init__(self, timeout: int = 30, verify: bool = True, follow_redirects: bool = False):
+    def __init__(self,
+                 timeout: int = 30,
+                 verify: bool = True,
+                 follow_redirects: bool = False,
+                 http2: bool = True,
+                 max_keepalive_connections: int = 50,
+                 keepalive_expiry: float = 60.0,
+                 shared: bool = True,
+                 max_concurrency_per_host: int = 16):
         """
         初始化 APIRequestTool。
 
@@ -16,6 +141,13 @@ class APIRequestTool:
             - timeout (int): 請求的超時時間（秒）。
             - verify (bool): 是否驗證 TLS 憑證。預設為 True，建議保持以確保安全。
             - follow_redirects (bool): 是否自動跟隨重新導向。
+            - http2 (bool): 是否啟用 HTTP/2 多工；未安裝 h2 時自動退回 HTTP/1.1。
+            - max_keepalive_connections (int): 連線池保留的閒置連線數。
+            - keepalive_expiry (float): 閒置連線保留秒數。
+            - shared (bool): 是否與其他相同設定的實例共用底層 client（連線池與 TLS context）。
+              預設為 True；設為 False 時建立專屬 client。
+            - max_concurrency_per_host (int): 對同一主機同時進行中的請求上限；遭限流（429/502/503/504）
+              時自動減半，連續成功後逐步回升（同一主機的限制器由首次建立者的設定決定）。
 
         返回:
             - None
@@ -32,8 +164,24 @@ class APIRequestTool:
             - httpx.HTTPStatusError: 4xx/5xx 等非 2xx 狀態碼（在 raise_for_status 之後）
             - ValueError: 發送的 payload 參數互斥檢查未通過
         """
-        self.client = httpx.Client(timeout=timeout, verify=verify, follow_redirects=follow_redirects)
+        http2 = http2 and _HTTP2_AVAILABLE
+        client_kwargs = {
+            "timeout": timeout,
+            "verify": verify,
+            "follow_redirects": follow_redirects,
+            "http2": http2,
+            "limits": httpx.Limits(max_keepalive_connections=max_keepalive_connections, keepalive_expiry=keepalive_expiry),
+        }
+        if shared:
+            self._shared_key: Optional[Tuple[Any, ...]] = (
+                timeout, verify, follow_redirects, http2, max_keepalive_connections, keepalive_expiry
+            )
+            self.client = _acquire_shared_client(self._shared_key, **client_kwargs)
+        else:
+            self._shared_key = None
+            self.client = httpx.Client(**client_kwargs)
         self._closed = False
+        self._max_concurrency_per_host = max_concurrency_per_host
         self._logger = logging.getLogger(__name__)
 
     def close(self) -> None:
@@ -54,10 +202,13 @@ class APIRequestTool:
             ...     tool.close()
 
         可能觸發的錯誤:
-            - 無直接丟出錯誤；若重複關閉將被忽略。
+            - 無直接丟出錯誤；若重複關閉將被忽略。共用 client 僅在最後一個使用者關閉時釋放。
         """
         if not self._closed:
-            self.client.close()
+            if self._shared_key is not None:
+                _release_shared_client(self._shared_key)
+            else:
+                self.client.close()
             self._closed = True
 
     def __enter__(self):
@@ -130,26 +281,10 @@ class APIRequestTool:
             - ValueError: 當 json_data、form_data、raw_text 同時提供超過一種。
             - httpx.RequestError/TimeoutException: 連線與逾時相關錯誤。
         """
-        provided_payloads = [p is not None for p in (json_data, form_data, raw_text)]
-        if sum(provided_payloads) > 1:
-            raise ValueError("json_data, form_data, raw_text 至多提供一種")
-        request_kwargs = {
-            "method": method,
-            "url": url,
-            "params": query_params,
-            "headers": headers,
-            "json": None,       
-            "data": None,       
-            "content": None     
-        }
-
-        if json_data:
-            request_kwargs["json"] = json_data
-        elif form_data:
-            request_kwargs["data"] = form_data
-        elif raw_text:
-            request_kwargs["content"] = raw_text
-
+        request_kwargs = _build_request_kwargs(method, url, query_params, headers, json_data, form_data, raw_text)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            # 僅記錄參數名稱，避免將 API 金鑰等參數值寫入日誌
+            self._logger.debug("HTTP %s %s params=%s", method, url, sorted(query_params or ()))
         response = self.client.request(**request_kwargs)
         return response
 
@@ -189,49 +324,304 @@ class APIRequestTool:
             - httpx.TimeoutException/httpx.RequestError/httpx.HTTPStatusError 轉換為回傳字典中的 error。
             - ValueError: 當多種 body 同時提供時（由內部方法丟出並在此處捕捉）。
         """
+        limiter = _limiter_for(url, self._max_concurrency_per_host)
         try:
-            response = self._send_request(method, url, query_params, headers, json_data, form_data, raw_text)
+            limiter.acquire()
+            throttled = False
+            try:
+                response = self._send_request(method, url, query_params, headers, json_data, form_data, raw_text)
+                throttled = response.status_code in _THROTTLE_STATUS_CODES
+            except _THROTTLE_EXCEPTIONS:
+                throttled = True
+                raise
+            finally:
+                limiter.release(throttled)
             response.raise_for_status() # 對於 4xx/5xx 狀態碼會拋出 httpx.HTTPStatusError
+            return _success_result(response)
+        except Exception as e:
+            result = _error_result(e)
+            # 使用 % 參數延遲格式化，未啟用 WARNING 時不產生字串
+            self._logger.warning("HTTP %s %s failed: %s", method, url, result["error"])
+            return result
 
-            # 回應處理
-            try:
-                response_body = response.json()
-            except (json.JSONDecodeError, ValueError): # 如果不是 JSON 格式或有其他 ValueError，則回傳原始文字
-                response_body = response.text
-
-            return {
-                "status_code": response.status_code,
-                "response_body": response_body,
-                "error": None
-            }
-
-        except ValueError as e:
-            return {
-                "status_code": None,
-                "response_body": None,
-                "error": str(e)
-            }
-        except httpx.TimeoutException as e:
-            return {
-                "status_code": None,
-                "response_body": None,
-                "error": f"API request timed out: {e}"
-            }
-        except httpx.HTTPStatusError as e:
-            return {
-                "status_code": e.response.status_code,
-                "response_body": e.response.text,
-                "error": f"API request failed: {e.response.status_code} {e.response.reason_phrase}"
-            }
-        except httpx.RequestError as e:
-            return {
-                "status_code": None,
-                "response_body": None,
-                "error": f"An error occurred while requesting {e.request.url!r}: {e}"
-            }
+
+def dig(obj: Any, *path: Any, default: Any = None) -> Any:
+    """
+    沿著鍵/索引路徑取出巢狀 JSON 結構中的值，任一層缺少時回傳 default。
+    成功路徑上不必為每一層建立 .get(key, {}) 的預設空字典。
+
+    參數:
+        - obj (Any): 解析後的 JSON 物件（dict/list）。
+        - *path (Any): 依序套用的鍵或索引。
+        - default (Any): 路徑不存在時的回傳值。
+
+    返回:
+        - Any: 路徑末端的值或 default。
+
+    使用範例:
+        >>> dig({"time": [{"parameter": {"parameterName": "晴"}}]}, "time", 0, "parameter", "parameterName")
+        '晴'
+        >>> dig({}, "time", 0) is None
+        True
+    """
+    try:
+        for key in path:
+            obj = obj[key]
+        return obj
+    except (KeyError, IndexError, TypeError):
+        return default
+
+
+def _build_request_kwargs(method: str,
+                          url: str,
+                          query_params: Optional[Dict[str, Any]],
+                          headers: Optional[Dict[str, str]],
+                          json_data: Optional[Dict[str, Any]],
+                          form_data: Optional[Dict[str, Any]],
+                          raw_text: Optional[str]) -> Dict[str, Any]:
+    """
+    依參數組合 httpx 的 request 關鍵字參數，同步與非同步工具共用。
+
+    參數:
+        - 同 APIRequestTool._send_request。
+
+    返回:
+        - Dict[str, Any]: 可直接傳入 client.request 的關鍵字參數。
+
+    可能觸發的錯誤:
+        - ValueError: 當 json_data、form_data、raw_text 同時提供超過一種。
+    """
+    # 以 is not None 判斷，刻意傳入的空 body（例如 {} 或 ""）也會送出
+    body_kwargs = {
+        key: value
+        for key, value in (("json", json_data), ("data", form_data), ("content", raw_text))
+        if value is not None
+    }
+    if len(body_kwargs) > 1:
+        raise ValueError("json_data, form_data, raw_text 至多提供一種")
+    return {
+        "method": method,
+        "url": url,
+        "params": query_params,
+        "headers": headers,
+        **body_kwargs,
+    }
+
+
+def _success_result(response: httpx.Response) -> Dict[str, Any]:
+    """
+    將成功的回應轉為工具結果字典；回應主體優先解析為 JSON，失敗則回傳原始文字。
+    """
+    try:
+        if orjson is not None:
+            # 直接解析位元組，省去先解碼成 str 的成本
+            response_body = orjson.loads(response.content)
+        else:
+            response_body = response.json()
+    except (json.JSONDecodeError, ValueError): # 如果不是 JSON 格式或有其他 ValueError，則回傳原始文字
+        response_body = response.text
+
+    return {
+        "status_code": response.status_code,
+        "response_body": response_body,
+        "error": None
+    }
+
+
+# 例外型別 -> (status_code, response_body, error) 的對應；依序比對，
+# TimeoutException 為 RequestError 的子類別，因此必須排在前面
+_EXC_HANDLERS: Dict[type, Callable[[Any], Tuple[Optional[int], Any, str]]] = {
+    ValueError: lambda e: (None, None, str(e)),
+    httpx.TimeoutException: lambda e: (None, None, f"API request timed out: {e}"),
+    httpx.HTTPStatusError: lambda e: (
+        e.response.status_code,
+        e.response.text,
+        f"API request failed: {e.response.status_code} {e.response.reason_phrase}",
+    ),
+    httpx.RequestError: lambda e: (None, None, f"An error occurred while requesting {e.request.url!r}: {e}"),
+}
+
+
+def _error_result(e: Exception) -> Dict[str, Any]:
+    """
+    將請求過程中的例外轉為工具結果字典，確保呼叫端取得穩定的回傳格式。
+    """
+    for exc_type, handler in _EXC_HANDLERS.items():
+        if isinstance(e, exc_type):
+            status_code, response_body, error = handler(e)
+            break
+    else:
+        status_code, response_body, error = None, None, f"An unexpected error occurred: {e}"
+    return {
+        "status_code": status_code,
+        "response_body": response_body,
+        "error": error
+    }
+
+
+class AsyncAPIRequestTool:
+    """
+    APIRequestTool 的非同步版本，以 httpx.AsyncClient 與連線池發送 HTTP 請求，
+    讓多個工具呼叫可透過 asyncio.gather 重疊網路等待時間。
+    回傳格式與 APIRequestTool.execute_request 相同。
+    """
+    def __init__(self,
+                 timeout: int = 30,
+                 verify: bool = True,
+                 follow_redirects: bool = False,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 100,
+                 http2: bool = True):
+        """
+        初始化 AsyncAPIRequestTool。
+
+        參數:
+            - timeout (int): 請求的超時時間（秒）。
+            - verify (bool): 是否驗證 TLS 憑證。預設為 True。
+            - follow_redirects (bool): 是否自動跟隨重新導向。
+            - max_connections (int): 連線池的最大連線數。
+            - max_keepalive_connections (int): 連線池保留的閒置連線數。
+            - http2 (bool): 是否啟用 HTTP/2 多工；未安裝 h2 時自動退回 HTTP/1.1。
+
+        返回:
+            - None
+
+        使用範例:
+            >>> async with AsyncAPIRequestTool(timeout=10) as tool:
+            ...     result = await tool.execute_request(method="GET", url="https://httpbin.org/get")
+
+        可能觸發的錯誤:
+            - 無（請求錯誤以結果字典中的 error 回傳）
+        """
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            verify=verify,
+            follow_redirects=follow_redirects,
+            http2=http2 and _HTTP2_AVAILABLE,
+            limits=limits,
+        )
+        self._closed = False
+        self._logger = logging.getLogger(__name__)
+
+    async def aclose(self) -> None:
+        """
+        關閉底層非同步 HTTP 連線資源；重複關閉將被忽略。
+
+        使用範例:
+            >>> tool = AsyncAPIRequestTool()
+            >>> await tool.aclose()
+        """
+        if not self._closed:
+            await self.client.aclose()
+            self._closed = True
+
+    async def __aenter__(self):
+        """
+        進入 async context manager，回傳物件本身。
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """
+        離開 async context manager 時自動釋放資源。
+        """
+        await self.aclose()
+
+    async def _send_request(self,
+                            method: Literal["GET", "POST", "PUT", "DELETE"],
+                            url: str,
+                            query_params: Optional[Dict[str, Any]] = None,
+                            headers: Optional[Dict[str, str]] = None,
+                            json_data: Optional[Dict[str, Any]] = None,
+                            form_data: Optional[Dict[str, Any]] = None,
+                            raw_text: Optional[str] = None) -> httpx.Response:
+        """
+        內部方法：非同步發送 HTTP 請求，參數與 APIRequestTool._send_request 相同。
+
+        可能觸發的錯誤:
+            - ValueError: 當 json_data、form_data、raw_text 同時提供超過一種。
+            - httpx.RequestError/TimeoutException: 連線與逾時相關錯誤。
+        """
+        request_kwargs = _build_request_kwargs(method, url, query_params, headers, json_data, form_data, raw_text)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug("HTTP %s %s params=%s", method, url, sorted(query_params or ()))
+        response = await self.client.request(**request_kwargs)
+        return response
+
+    async def execute_request(self,
+                              method: Literal["GET", "POST", "PUT", "DELETE"],
+                              url: str,
+                              query_params: Optional[Dict[str, Any]] = None,
+                              headers: Optional[Dict[str, str]] = None,
+                              json_data: Optional[Dict[str, Any]] = None,
+                              form_data: Optional[Dict[str, Any]] = None,
+                              raw_text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        非同步發送 API 請求並處理回應。
+
+        參數:
+            - 同 APIRequestTool.execute_request。
+
+        返回:
+            - Dict[str, Any]: status_code、response_body、error 三個鍵，格式同 APIRequestTool.execute_request。
+
+        使用範例:
+            >>> tool = AsyncAPIRequestTool()
+            >>> out = await tool.execute_request(method="GET", url="https://httpbin.org/status/200")
+            >>> out["status_code"]
+            200
+
+        可能觸發的錯誤:
+            - 所有請求錯誤皆轉換為回傳字典中的 error。
+        """
+        try:
+            response = await self._send_request(method, url, query_params, headers, json_data, form_data, raw_text)
+            response.raise_for_status()
+            return _success_result(response)
         except Exception as e:
-            return {
-                "status_code": None,
-                "response_body": None,
-                "error": f"An unexpected error occurred: {e}"
-            }
+            result = _error_result(e)
+            # 使用 % 參數延遲格式化，未啟用 WARNING 時不產生字串
+            self._logger.warning("HTTP %s %s failed: %s", method, url, result["error"])
+            return result
+
+    async def gather_requests(self,
+                              requests: List[Dict[str, Any]],
+                              max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        並行發送多個彼此獨立的請求，以 asyncio.Semaphore 限制同時進行的數量。
+
+        參數:
+            - requests (List[Dict[str, Any]]): 每個元素為 execute_request 的關鍵字參數，
+              例如 {"method": "GET", "url": "https://example.com"}。
+            - max_concurrency (int): 同時進行的請求上限，預設為 8。
+
+        返回:
+            - List[Dict[str, Any]]: 與 requests 順序一致的結果列表，格式同 execute_request。
+
+        使用範例:
+            >>> async with AsyncAPIRequestTool() as tool:
+            ...     results = await tool.gather_requests([
+            ...         {"method": "GET", "url": "https://httpbin.org/get"},
+            ...         {"method": "GET", "url": "https://httpbin.org/uuid"},
+            ...     ], max_concurrency=2)
+            >>> len(results)
+            2
+
+        可能觸發的錯誤:
+            - ValueError: max_concurrency 小於 1。
+            - 各請求的錯誤皆轉換為對應結果字典中的 error。
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency 必須為正整數")
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _execute_one(request_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.execute_request(**request_kwargs)
+                except TypeError as e:
+                    # 參數名稱錯誤時仍以統一格式回傳，避免中斷其他請求
+                    return _error_result(e)
+
+        return await asyncio.gather(*(_execute_one(r) for r in requests))
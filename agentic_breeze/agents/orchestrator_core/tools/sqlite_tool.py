@@ -1,7 +1,8 @@
 import sqlite3
 from dataclasses import dataclass
-from typing import List, Optional, Literal, Dict, Any, Tuple, Union
+from typing import List, Optional, Literal, Dict, Any, Iterator, Tuple, Union
 import os
+import threading
 
 # 定義 SQLite 支援的資料類型
 SQLiteType = Literal["TEXT", "INTEGER", "REAL", "BLOB", "NUMERIC"]
@@ -26,21 +27,76 @@ class TableDefinition:
     # 未來可以考慮添加 indexes: List[IndexDefinition] 等更複雜的定義
 
 
+# 連線建立後只設定一次的 PRAGMA，降低 fsync 與暫存 I/O 成本
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+# 每條連線保留的已編譯語句數；sqlite3 以 SQL 文字為鍵快取 prepared statement，
+# 相同查詢重複執行時免去重新解析與編譯 VDBE
+_STMT_CACHE_SIZE = 256
+
+
 class SQLiteSchemaTool:
     """
     一個用於管理 SQLite 資料庫 schema 和執行查詢的工具。
+
+    每個實例持有一條延遲建立的長期連線，保留 SQLite 的頁面快取；
+    呼叫端應共用同一個實例，並在結束時呼叫 close()。
     """
     def __init__(self, db_path: str = "sample_users.db"):
         self._db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_verified = False # 是否已確認資料庫檔案存在（成功開啟過連線）
+        # 連線跨執行緒共用（ToolExecutor 以執行緒池執行工具），所有存取皆以此鎖序列化
+        self._lock = threading.RLock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """取得長期連線；首次呼叫時建立並設定 PRAGMA。呼叫端需持有 self._lock。"""
+        if self._conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=30, check_same_thread=False, isolation_level=None,
+                                   cached_statements=_STMT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row
+            self._enable_wal(conn)
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._conn = conn
+            self._db_verified = True
+        return self._conn
+
+    def _enable_wal(self, conn: sqlite3.Connection) -> None:
+        """
+        可寫入時切換為 WAL 模式，讓讀寫可並行。WAL 會寫入資料庫檔頭並在同目錄建立
+        -wal/-shm 檔，因此檔案或所在目錄不可寫入時維持原本的日誌模式；
+        切換失敗（例如唯讀的檔案系統）時同樣沿用原模式，查詢不受影響。
+        """
+        directory = os.path.dirname(os.path.abspath(self._db_path))
+        if not (os.access(self._db_path, os.W_OK) and os.access(directory, os.W_OK)):
+            return
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass
+
+    def close(self) -> None:
+        """關閉長期連線；重複呼叫將被忽略，之後的操作會重新建立連線。"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def _table_exists(self, cursor: sqlite3.Cursor, table_name: str) -> bool:
         """檢查資料表是否存在。"""
-        cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
+        # 以參數綁定查詢：避免注入，且不同表名共用同一個已編譯語句
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=? LIMIT 1", (table_name,))
         return cursor.fetchone() is not None
 
     def _get_existing_columns(self, cursor: sqlite3.Cursor, table_name: str) -> Dict[str, Dict[str, Any]]:
         """獲取現有資料表的欄位資訊。"""
-        cursor.execute(f"PRAGMA table_info('{table_name}')")
+        # PRAGMA 語法不接受參數，改用等價的表值函式 pragma_table_info 以綁定表名
+        cursor.execute('SELECT name, type, "notnull", pk, dflt_value FROM pragma_table_info(?)', (table_name,))
         columns_info = {}
         for row in cursor.fetchall():
             columns_info[row['name']] = {
@@ -52,25 +108,28 @@ class SQLiteSchemaTool:
             }
         return columns_info
 
+    @staticmethod
+    def _column_sql(col: ColumnDefinition) -> str:
+        """將單一欄位定義組成欄位 DDL 片段，各子句收集於 list 後一次 join。"""
+        parts = [col.name, col.dtype]
+        if not col.nullable:
+            parts.append("NOT NULL")
+        if col.is_unique:
+            parts.append("UNIQUE")
+        if col.default is not None:
+            # 確保預設值格式正確，例如字串需要單引號
+            default_literal = f"'{col.default}'" if col.dtype == "TEXT" else str(col.default)
+            parts.append(f"DEFAULT {default_literal}")
+        return " ".join(parts)
+
     def _generate_create_table_ddl(self, table_definition: TableDefinition) -> str:
         """根據 TableDefinition 生成 CREATE TABLE 語句。"""
         columns_sql = []
         primary_keys = []
         for col in table_definition.columns:
-            col_sql = f"{col.name} {col.dtype}"
-            if not col.nullable:
-                col_sql += " NOT NULL"
-            if col.is_unique:
-                col_sql += " UNIQUE"
-            if col.default is not None:
-                # 確保預設值格式正確，例如字串需要單引號
-                if col.dtype == "TEXT":
-                    col_sql += f" DEFAULT '{col.default}'"
-                else:
-                    col_sql += f" DEFAULT {col.default}"
             if col.is_primary_key:
                 primary_keys.append(col.name)
-            columns_sql.append(col_sql)
+            columns_sql.append(self._column_sql(col))
 
         if primary_keys:
             columns_sql.append(f"PRIMARY KEY ({', '.join(primary_keys)})")
@@ -86,23 +145,26 @@ class SQLiteSchemaTool:
         for new_col in table_definition.columns:
             if new_col.name not in existing_columns:
                 # 追加新欄位
-                col_sql = f"{new_col.name} {new_col.dtype}"
-                if not new_col.nullable:
-                    col_sql += " NOT NULL"
-                if new_col.is_unique:
-                    col_sql += " UNIQUE"
-                if new_col.default is not None:
-                    if new_col.dtype == "TEXT":
-                        col_sql += f" DEFAULT '{new_col.default}'"
-                    else:
-                        col_sql += f" DEFAULT {new_col.default}"
-                ddl_statements.append(f"ALTER TABLE {table_definition.name} ADD COLUMN {col_sql}")
+                ddl_statements.append(f"ALTER TABLE {table_definition.name} ADD COLUMN {self._column_sql(new_col)}")
             # 簡化處理：對於現有欄位，不允許更改類型或刪除，避免數據破壞
 
         # 這裡可以添加索引的處理邏輯，例如為 is_unique 和 is_primary_key 的欄位自動創建索引
         # 或者支援 TableDefinition 中明確定義的索引
         return ddl_statements
 
+    def _apply_ddl_batch(self, conn: sqlite3.Connection, ddl_statements: List[str]) -> None:
+        """
+        在單一 BEGIN IMMEDIATE 交易中執行所有 DDL，只提交（fsync）一次；
+        任一語句失敗即整批回滾，避免資料表停在部分遷移的狀態。呼叫端需持有 self._lock。
+        """
+        script = "BEGIN IMMEDIATE;\n" + ";\n".join(ddl_statements) + ";\nCOMMIT;"
+        try:
+            conn.executescript(script)
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
     def define_table(self, table_definition: TableDefinition) -> Dict[str, Any]:
         """
         根據 dataclass 定義的 schema 遷移資料表。
@@ -111,11 +173,12 @@ class SQLiteSchemaTool:
         try:
             # 在嘗試獲取連接之前，先檢查資料庫檔案是否存在。
             # 如果檔案不存在，則直接返回錯誤，因為設定LLM 無法創建新的資料庫檔案。
-            if not os.path.exists(self._db_path):
+            # 連線一旦開啟即代表檔案已存在，之後的呼叫不再 stat 檔案。
+            if not self._db_verified and not os.path.exists(self._db_path):
                 return {"status": "error", "message": f"Database file '{self._db_path}' does not exist. New table creation is not allowed.", "error_details": "Database file not found and creation disallowed"}
 
-            with sqlite3.connect(self._db_path, timeout=30) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._lock:
+                conn = self._get_conn()
                 cursor = conn.cursor()
                 table_name = table_definition.name
 
@@ -126,15 +189,12 @@ class SQLiteSchemaTool:
                     existing_columns = self._get_existing_columns(cursor, table_name)
                     ddl_statements = self._generate_migrate_ddl(table_definition, existing_columns)
                     if ddl_statements:
-                        for ddl in ddl_statements:
-                            cursor.execute(ddl)
-                        conn.commit()
+                        self._apply_ddl_batch(conn, ddl_statements)
                         return {"status": "success", "message": f"Table '{table_name}' migrated successfully. Added {len(ddl_statements)} new columns."}
                     else:
                         return {"status": "success", "message": f"Table '{table_name}' schema is up to date."}
 
         except sqlite3.Error as e:
-            # with 語句會自動處理連接關閉，這裡只需處理回滾
             return {"status": "error", "message": f"Failed to define/migrate table '{table_name}': {e}", "error_details": str(e)}
         except Exception as e:
             return {"status": "error", "message": f"An unexpected error occurred during table definition: {e}", "error_details": str(e)}
@@ -144,32 +204,50 @@ class SQLiteSchemaTool:
         執行 SELECT 語句並回傳結果為字典列表。
         """
         try:
-            with sqlite3.connect(self._db_path, timeout=30) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                if params:
-                    cursor.execute(sql_query, params)
-                else:
-                    cursor.execute(sql_query)
-                
-                rows = cursor.fetchall()
-                # sqlite3.Row 已經讓結果可以像字典一樣訪問
-                results = [dict(row) for row in rows]
-                
-                return {"status": "success", "data": results, "row_count": len(results)}
+            results = list(self.query_iter(sql_query, params))
+            return {"status": "success", "data": results, "row_count": len(results)}
         except sqlite3.Error as e:
             return {"status": "error", "message": f"Failed to query data: {e}", "error_details": str(e)}
         except Exception as e:
             return {"status": "error", "message": f"An unexpected error occurred during data query: {e}", "error_details": str(e)}
 
+    def query_iter(self, sql_query: str, params: Optional[Union[Tuple, Dict]] = None,
+                   chunk_size: int = 256) -> Iterator[Dict[str, Any]]:
+        """
+        執行 SELECT 語句並逐列產生字典，以 fetchmany 分批讀取，不一次載入整個結果集。
+        只在執行語句與讀取每一批時持有連線鎖，產生資料列時不持有，呼叫端中途停止迭代
+        也不會阻塞其他操作；SQL 錯誤以 sqlite3.Error 拋出。
+        """
+        with self._lock:
+            # 同一段 SQL 文字會命中連線的 prepared statement 快取
+            cursor = self._get_conn().cursor()
+            # 直接取用原始 tuple，以欄位名稱 zip 成字典，省去 sqlite3.Row 的中介物件
+            cursor.row_factory = None
+            cursor.execute(sql_query, params or ())
+            if cursor.description is None:
+                cursor.close()
+                return
+            keys = [d[0] for d in cursor.description]
+        try:
+            while True:
+                with self._lock:
+                    batch = cursor.fetchmany(chunk_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(zip(keys, row))
+        finally:
+            # 提早結束迭代時也釋放語句，不讓未讀完的查詢佔住讀取快照
+            with self._lock:
+                cursor.close()
+
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """
         獲取指定資料表的詳細資訊，包括欄位、型別等。
         """
         try:
-            with sqlite3.connect(self._db_path, timeout=30) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._get_conn().cursor()
                 
                 if not self._table_exists(cursor, table_name):
                     return {"status": "error", "message": f"Table '{table_name}' does not exist.", "error_details": "Table not found"}
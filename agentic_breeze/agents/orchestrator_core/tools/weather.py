@@ -1,8 +1,11 @@
-from typing import Dict, Any, Optional
-from .api_tool import APIRequestTool
+from typing import Dict, Any, List, Optional, Tuple
+from .api_tool import APIRequestTool, dig
 
+import copy
 import os
 import logging
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
@@ -11,12 +14,14 @@ class CWAWeatherTool:
     一個專門用於查詢中央氣象署 (CWA) 天氣資訊的工具。
     它使用 APIRequestTool 內部發送 HTTP 請求。
     """
-    def __init__(self, api_request_tool: APIRequestTool):
+    def __init__(self, api_request_tool: APIRequestTool, cache_ttl: float = 900, cache_size: int = 256):
         """
         初始化 CWAWeatherTool。
 
         參數:
             - api_request_tool (APIRequestTool): 內部使用的 HTTP 請求工具。
+            - cache_ttl (float): 成功查詢結果的快取秒數，預設 900 秒；設為 0 表示停用快取。
+            - cache_size (int): 快取的最大筆數。
 
         返回:
             - None
@@ -32,10 +37,24 @@ class CWAWeatherTool:
         self.base_url = "https://opendata.cwa.gov.tw/api/v1/rest/datastore"
         # 從環境變數獲取 CWA API Key
         self.cwa_api_key = os.getenv("CWA_API_KEY")
+        # 固定的查詢參數與標頭只建立一次，每次請求直接重用（httpx 不會修改傳入的字典）
+        self._base_params = {
+            "Authorization": self.cwa_api_key,
+            "format": "JSON"
+        }
+        self._headers = {
+            "accept": "application/json"
+        }
+        # 預報資料每數小時才更新，以 (dataset_id, location_name) 為鍵快取成功結果
+        self._cache_ttl = cache_ttl
+        self._cache_size = cache_size
+        self._cache: Dict[Tuple[str, Optional[str]], Tuple[float, Dict[str, Any]]] = {}
+        self._cache_lock = threading.Lock()
 
     def get_national_forecast(self, dataset_id: str = "F-C0032-001", location_name: Optional[str] = None) -> Dict[str, Any]:
         """
         獲取中央氣象署 (CWA) 的全國天氣預報資料，可選擇篩選特定地點。
+        成功的查詢結果會快取 cache_ttl 秒，期間相同參數的查詢不再發送 HTTP 請求。
 
         參數:
             - dataset_id (str): CWA 資料集 ID，預設為 "F-C0032-001"（36 小時天氣預報）。
@@ -57,24 +76,98 @@ class CWAWeatherTool:
             - 缺少 CWA_API_KEY（以 {"status":"error","message":...} 回傳）
             - 上游 HTTP 錯誤或資料格式異常（以 error 結構回傳）
         """
+        cache_key = (dataset_id, location_name)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self._fetch_national_forecast(dataset_id, location_name)
+        # 僅快取成功結果，錯誤（例如暫時性的網路問題）下次仍會重新查詢
+        if result.get("status") == "success":
+            self._cache_set(cache_key, result)
+        return result
+
+    def get_forecasts(self, location_names: List[str], dataset_id: str = "F-C0032-001") -> Dict[str, Any]:
+        """
+        一次取得多個地點的天氣預報。CWA 單次回應即包含所有縣市，
+        因此只發送一次請求（並共用全國預報的快取），再依地點名稱取出。
+
+        參數:
+            - location_names (List[str]): 地點名稱列表，例如 ["臺北市", "高雄市"]。
+            - dataset_id (str): CWA 資料集 ID，預設為 "F-C0032-001"。
+
+        返回:
+            - Dict[str, Any]:
+              - status (str): "success" 或 "error"。
+              - forecasts (Dict[str, Optional[Dict]]): 成功時為 {地點名稱: 預報}，查無資料的地點為 None。
+              - message/error (Optional[str]): 錯誤時的訊息。
+
+        使用範例:
+            >>> weather = CWAWeatherTool(api_request_tool=APIRequestTool())
+            >>> out = weather.get_forecasts(["臺北市", "高雄市"])
+            >>> out.get("status") in {"success", "error"}
+            True
+
+        可能觸發的錯誤:
+            - 同 get_national_forecast（以 error 結構回傳）
+        """
+        national = self.get_national_forecast(dataset_id=dataset_id)
+        if national.get("status") != "success":
+            return national
+
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for forecast in national["forecast"]:
+            # 與 get_national_forecast 一致，同名地點以第一筆為準
+            by_name.setdefault(forecast.get("locationName"), forecast)
+        return {"status": "success", "forecasts": {name: by_name.get(name) for name in location_names}}
+
+    def _cache_get(self, key: Tuple[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """
+        讀取未過期的快取結果；過期項目會被移除。
+        回傳深層複本，呼叫端修改結果不會影響快取內容。
+        """
+        if self._cache_ttl <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at >= self._cache_ttl:
+                del self._cache[key]
+                return None
+        return copy.deepcopy(result)
+
+    def _cache_set(self, key: Tuple[str, Optional[str]], result: Dict[str, Any]) -> None:
+        """
+        寫入快取；超過上限時淘汰最早寫入的項目。
+        保存深層複本，之後對傳入結果的修改不會影響快取內容。
+        """
+        if self._cache_ttl <= 0 or self._cache_size <= 0:
+            return
+        result = copy.deepcopy(result)
+        with self._cache_lock:
+            self._cache.pop(key, None)
+            self._cache[key] = (time.monotonic(), result)
+            while len(self._cache) > self._cache_size:
+                del self._cache[next(iter(self._cache))]
+
+    def _fetch_national_forecast(self, dataset_id: str, location_name: Optional[str]) -> Dict[str, Any]:
+        """
+        實際向 CWA 查詢並簡化預報資料，參數與回傳格式同 get_national_forecast。
+        """
         if not self.cwa_api_key:
             msg = "Missing environment variable CWA_API_KEY"
             _logger.error(msg)
             return {"status": "error", "message": msg, "error": msg}
         endpoint = f"{self.base_url}/{dataset_id}"
-        query_params = {
-            "Authorization": self.cwa_api_key,
-            "format": "JSON"
-        }
-        headers = {
-            "accept": "application/json"
-        }
-
+        # 指定地點時交由 CWA 伺服器端篩選，回應只含該地點而非全部縣市
+        query_params = {**self._base_params, "locationName": location_name} if location_name else self._base_params
         response_data = self.api_request_tool.execute_request(
             method="GET",
             url=endpoint,
             query_params=query_params,
-            headers=headers
+            headers=self._headers
         )
 
         if response_data["error"]:
@@ -87,34 +180,40 @@ class CWAWeatherTool:
             # 這裡可以根據實際需求，對 response_body 進行更詳細的解析和提取
             # 例如，提取每個縣市的預報資訊，但為了簡潔，先回傳部分數據
             location_data = response_body["records"].get("location", [])
-            simplified_forecast = []
-            for loc in location_data:
-                current_location_name = loc.get("locationName")
-                # 如果指定了地點名稱，則只處理匹配的地點
-                if location_name and current_location_name != location_name:
-                    continue
-
-                weather_elements = loc.get("weatherElement", [])
-                # 簡化提取部分天氣元素，例如「天氣現象」和「最低/最高溫度」
-                wx = next((e for e in weather_elements if e.get("elementName") == "Wx"), None)
-                min_t = next((e for e in weather_elements if e.get("elementName") == "MinT"), None)
-                max_t = next((e for e in weather_elements if e.get("elementName") == "MaxT"), None)
-
-                current_forecast = {"locationName": current_location_name}
-                if wx and wx.get("time"):
-                    current_forecast["weather_phenomenon"] = wx["time"][0].get("parameter", {}).get("parameterName")
-                if min_t and min_t.get("time"):
-                    current_forecast["min_temperature"] = min_t["time"][0].get("parameter", {}).get("parameterName")
-                if max_t and max_t.get("time"):
-                    current_forecast["max_temperature"] = max_t["time"][0].get("parameter", {}).get("parameterName")
-                simplified_forecast.append(current_forecast)
-            
-            if location_name and not simplified_forecast:
-                return {"status": "error", "message": f"Could not find weather forecast for location '{location_name}'."}
-            elif location_name and simplified_forecast:
-                return {"status": "success", "forecast": simplified_forecast[0]} # 如果指定地點，只回傳第一個匹配項
-            else:
-                return {"status": "success", "forecast": simplified_forecast}
+            if location_name:
+                # 部分資料集會忽略 locationName 篩選，仍在本地找第一個匹配項作為保險
+                loc = next((l for l in location_data if l.get("locationName") == location_name), None)
+                if loc is None:
+                    return {"status": "error", "message": f"Could not find weather forecast for location '{location_name}'."}
+                return {"status": "success", "forecast": self._simplify_location(loc)}
+            return {"status": "success", "forecast": [self._simplify_location(loc) for loc in location_data]}
         else:
             msg = "CWA forecast data not available or unexpected response format."
             return {"status": "error", "message": msg, "error": msg}
+
+    @staticmethod
+    def _simplify_location(loc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        將單一地點的 CWA 預報資料簡化為天氣現象與最低/最高溫度。
+
+        參數:
+            - loc (Dict[str, Any]): CWA 回應中 records.location 的單一元素。
+
+        返回:
+            - Dict[str, Any]: 含 locationName，以及存在時的 weather_phenomenon、min_temperature、max_temperature。
+        """
+        # 每個地點只建立一次 elementName 索引，再以 O(1) 查詢所需元素
+        elements = {e.get("elementName"): e for e in loc.get("weatherElement", [])}
+        # 簡化提取部分天氣元素，例如「天氣現象」和「最低/最高溫度」
+        wx = elements.get("Wx")
+        min_t = elements.get("MinT")
+        max_t = elements.get("MaxT")
+
+        current_forecast = {"locationName": loc.get("locationName")}
+        if wx and wx.get("time"):
+            current_forecast["weather_phenomenon"] = dig(wx, "time", 0, "parameter", "parameterName")
+        if min_t and min_t.get("time"):
+            current_forecast["min_temperature"] = dig(min_t, "time", 0, "parameter", "parameterName")
+        if max_t and max_t.get("time"):
+            current_forecast["max_temperature"] = dig(max_t, "time", 0, "parameter", "parameterName")
+        return current_forecast
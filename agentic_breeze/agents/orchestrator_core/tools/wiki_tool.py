@@ -1,12 +1,28 @@
 # wiki_tool.py
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from pydantic import BaseModel, Field
-from .api_tool import APIRequestTool
+from .api_tool import APIRequestTool, dig
 import json
 import logging
 
+try:
+    import orjson
+except ImportError:  # orjson 為選用相依套件，未安裝時退回標準函式庫 json
+    orjson = None
+
 _logger = logging.getLogger(__name__)
 
+
+def _dumps(obj: Any) -> str:
+    """
+    將工具結果序列化為 JSON 字串。完整條目內容可達數 MB，有 orjson 時以其輸出 UTF-8；
+    退回 json 時同樣不跳脫非 ASCII 字元，解析結果兩者相同。
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
 class WikiSearchParams(BaseModel):
     """Wikipedia 搜尋工具的參數"""
     query: str = Field(..., description="要在 Wikipedia 上搜尋的關鍵字或短語。")
@@ -48,6 +64,10 @@ class WikiTool:
             - 上游 HTTP 錯誤（會以 {"status":"error","message": "..."} 回傳）
             - 回應結構異常（以 error JSON 字串回傳）
         """
+        return _dumps(self._search(query, limit))
+
+    def _search(self, query: str, limit: int = 10) -> Dict[str, Any]:
+        """search 的實作，回傳 Python 字典，供內部呼叫時免去 JSON 序列化與解析。"""
         params = {
             "action": "query",
             "list": "search",
@@ -62,16 +82,18 @@ class WikiTool:
             query_params=params,
             headers=self.headers
         )
-        _logger.debug("wiki_search API 原始回應: %s", json.dumps(res['response_body'], indent=2, ensure_ascii=False))
+        if _logger.isEnabledFor(logging.DEBUG):
+            # 僅在啟用 DEBUG 時才序列化原始回應，避免對大型內容做無用的 dumps
+            _logger.debug("wiki_search API 原始回應: %s", json.dumps(res['response_body'], indent=2, ensure_ascii=False))
         if res["error"]:
-            return json.dumps({"status": "error", "message": res["error"]})
+            return {"status": "error", "message": res["error"]}
 
         try:
             items = res["response_body"]["query"]["search"]
             titles = [it["title"] for it in items]
-            return json.dumps({"status": "success", "titles": titles, "raw": items})
+            return {"status": "success", "titles": titles, "raw": items}
         except Exception as e:
-            return json.dumps({"status": "error", "message": f"Unexpected response format: {e}"})
+            return {"status": "error", "message": f"Unexpected response format: {e}"}
 
     def get_page_info(self, title: str) -> str:
         """
@@ -93,6 +115,10 @@ class WikiTool:
             - 上游 HTTP 錯誤（以 error JSON 字串回傳）
             - 回應結構異常（以 error JSON 字串回傳）
         """
+        return _dumps(self._get_page_info(title))
+
+    def _get_page_info(self, title: str) -> Dict[str, Any]:
+        """get_page_info 的實作，回傳 Python 字典。"""
         params = {
             "action": "query",
             "prop": "info",
@@ -109,12 +135,12 @@ class WikiTool:
             headers=self.headers
         )
         if res["error"]:
-            return json.dumps({"status": "error", "message": res["error"]})
+            return {"status": "error", "message": res["error"]}
 
         try:
             pages = res["response_body"]["query"]["pages"]
             if not pages:
-                return json.dumps({"status": "error", "message": f"No page info for: {title}"})
+                return {"status": "error", "message": f"No page info for: {title}"}
             
             page = None
             if isinstance(pages, dict):
@@ -124,11 +150,11 @@ class WikiTool:
                 page = pages[0]
             
             if page is None:
-                return json.dumps({"status": "error", "message": f"Unexpected page structure for: {title}"})
+                return {"status": "error", "message": f"Unexpected page structure for: {title}"}
 
-            return json.dumps({"status": "success", "page": page})
+            return {"status": "success", "page": page}
         except Exception as e:
-            return json.dumps({"status": "error", "message": f"Unexpected response format for page info: {e}"})
+            return {"status": "error", "message": f"Unexpected response format for page info: {e}"}
 
     def get_full_content(self, title: str) -> str:
         """
@@ -150,6 +176,10 @@ class WikiTool:
             - 上游 HTTP 錯誤（以 error JSON 字串回傳）
             - 回應結構異常（以 error JSON 字串回傳）
         """
+        return _dumps(self._get_full_content(title))
+
+    def _get_full_content(self, title: str) -> Dict[str, Any]:
+        """get_full_content 的實作，回傳 Python 字典。"""
         params = {
             "action": "query",
             "prop": "revisions",
@@ -166,14 +196,16 @@ class WikiTool:
             query_params=params,
             headers=self.headers
         )
-        _logger.debug("wiki_get_full_content API 原始回應: %s", json.dumps(res['response_body'], indent=2, ensure_ascii=False))
+        if _logger.isEnabledFor(logging.DEBUG):
+            # 僅在啟用 DEBUG 時才序列化原始回應，避免對大型內容做無用的 dumps
+            _logger.debug("wiki_get_full_content API 原始回應: %s", json.dumps(res['response_body'], indent=2, ensure_ascii=False))
         if res["error"]:
-            return json.dumps({"status": "error", "message": res["error"]})
+            return {"status": "error", "message": res["error"]}
 
         try:
             pages = res["response_body"]["query"]["pages"]
             if not pages:
-                return json.dumps({"status": "error", "message": f"No content for: {title}"})
+                return {"status": "error", "message": f"No content for: {title}"}
 
             page_data = None
             if isinstance(pages, dict):
@@ -183,17 +215,67 @@ class WikiTool:
                 page_data = pages[0]
 
             if page_data is None:
-                return json.dumps({"status": "error", "message": f"Unexpected page structure for content: {title}"})
+                return {"status": "error", "message": f"Unexpected page structure for content: {title}"}
 
             # 提取完整維基文本內容
-            revisions = page_data.get("revisions", [{}])
-            full_content = revisions[0].get("slots", {}).get("main", {}).get("content")
+            full_content = dig(page_data, "revisions", 0, "slots", "main", "content")
             if full_content is None:
-                return json.dumps({"status": "error", "message": f"Could not find full content for: {title}"})
+                return {"status": "error", "message": f"Could not find full content for: {title}"}
 
-            return json.dumps({"status": "success", "content": full_content})
+            return {"status": "success", "content": full_content}
         except Exception as e:
-            return json.dumps({"status": "error", "message": f"Unexpected response format for full content: {e}"})
+            return {"status": "error", "message": f"Unexpected response format for full content: {e}"}
+
+    def _fetch_pages(self, titles: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        以單一 action=query 請求（prop=info|revisions，標題以 | 串接）同時取得多個頁面的資訊與內容。
+
+        參數:
+            - titles (List[str]): 頁面標題列表（MediaWiki 單次上限 50 個）。
+
+        返回:
+            - Optional[Dict[str, Dict[str, Any]]]: {請求的標題: 頁面資料}，經正規化或重新導向的標題
+              仍以原始請求標題為鍵；不存在的頁面不會出現。請求失敗或回應結構異常時為 None。
+        """
+        params = {
+            "action": "query",
+            "prop": "info|revisions",
+            "inprop": "url",
+            "rvprop": "content",
+            "rvslots": "main",
+            "titles": "|".join(titles),
+            "format": "json",
+            "formatversion": 2,
+            "redirects": 1,
+        }
+        res = self.api_request_tool.execute_request(
+            method="GET",
+            url=self.base_url,
+            query_params=params,
+            headers=self.headers
+        )
+        if res["error"]:
+            _logger.warning("wiki 批次頁面查詢失敗: %s", res["error"])
+            return None
+
+        try:
+            query = res["response_body"]["query"]
+            pages_by_title = {page["title"]: page for page in query.get("pages", []) if not page.get("missing")}
+            # 將請求標題經 normalized 與 redirects 對應到實際頁面標題
+            aliases = {entry["from"]: entry["to"] for entry in query.get("normalized", [])}
+            redirects = {entry["from"]: entry["to"] for entry in query.get("redirects", [])}
+        except Exception as e:
+            _logger.warning("wiki 批次頁面查詢回應格式異常: %s", e)
+            return None
+
+        pages = {}
+        for title in titles:
+            resolved = aliases.get(title, title)
+            resolved = redirects.get(resolved, resolved)
+            page = pages_by_title.get(resolved)
+            if page is not None:
+                pages[title] = page
+        return pages
 
     def smart_content(self, query: str, limit: int = 2) -> str:
         """
@@ -219,37 +301,38 @@ class WikiTool:
 
 
         # ... 這裡使用原始的實作邏輯 ...
-        s = self.search(query, limit=limit)
+        search_results = self._search(query, limit=limit)
         # --- 添加除錯輸出 --- start
-        search_results = json.loads(s)
         if search_results.get("status") == "success":
             _logger.debug("wiki_smart_content 搜尋到的標題: %s", search_results.get('titles', []))
         # --- 添加除錯輸出 --- end
         if search_results.get("status") != "success":
-            return s
+            return _dumps(search_results)
         titles: List[str] = search_results.get("titles", [])
         if not titles:
-            return json.dumps({"status": "error", "message": f"No result for: {query}"})
+            return _dumps({"status": "error", "message": f"No result for: {query}"})
+
+        pages = self._fetch_pages(titles)
+        if pages is None:
+            return _dumps({"status": "error", "message": f"無法為 {query} 獲取任何有效摘要。"})
 
         all_contents = []
         for title in titles:
-            info = self.get_page_info(title)
-            info_obj = json.loads(info)
-            if info_obj.get("status") != "success":
-                # 如果某個條目獲取失敗，可以選擇跳過或記錄錯誤，這裡選擇跳過
+            page = pages.get(title)
+            if page is None:
+                # 如果某個條目獲取失敗（頁面不存在或缺少內容），可以選擇跳過或記錄錯誤，這裡選擇跳過
                 continue
-            content_text = self.get_full_content(title)
-            content_obj = json.loads(content_text)
-            if content_obj.get("status") != "success":
+            content = dig(page, "revisions", 0, "slots", "main", "content")
+            if content is None:
                 continue
-            
+
             all_contents.append({
-                "title": info_obj.get("page", {}).get("title"),
-                "url": info_obj.get("page", {}).get("fullurl"),
-                "content": content_obj.get("content")
+                "title": page.get("title"),
+                "url": page.get("fullurl"),
+                "content": content
             })
         
         if not all_contents:
-            return json.dumps({"status": "error", "message": f"無法為 {query} 獲取任何有效摘要。"})
+            return _dumps({"status": "error", "message": f"無法為 {query} 獲取任何有效摘要。"})
 
-        return json.dumps({"status": "success", "results": all_contents})
+        return _dumps({"status": "success", "results": all_contents})
@@ -3,47 +3,74 @@
 Agentic Breeze CLI - Command Line Interface for Agentic Breeze Agent Framework
 """
 import argparse
+import functools
+from collections import deque
 import sys
 import os
+import time
 
-from agentic_breeze.agents.orchestrator import Orchestrator
-from agentic_breeze.llm.llm_client import LLMConnector
-from agentic_breeze.prompts.prompt_manager import PromptManager
-from agentic_breeze.agents.orchestrator_core.planning_manager import PlanningManager
-from agentic_breeze.agents.orchestrator_core.tool_executor import ToolExecutor
-from agentic_breeze.agents.orchestrator_core.query_rewriter import QueryRewriter
-from agentic_breeze.agents.orchestrator_core.conversation_manager import ConversationManager
-from agentic_breeze.agents.orchestrator_core.synthesis_generator import SynthesisGenerator
-from agentic_breeze.registry.tool_registry import ToolRegistry
+# Minimum seconds between partial-reply updates pushed to the Gradio UI
+_WEB_STREAM_INTERVAL = 0.033
+# Maximum seconds streamed tokens may sit in the CLI's write buffer
+_CLI_FLUSH_INTERVAL = 0.03
+# Gradio turns converted per request: 2 messages each, the same 40-message headroom
+# the CLI keeps over the orchestrator's 20-message window
+_WEB_HISTORY_TURNS = 20
 
 
 def create_orchestrator():
     """Create and configure the Agentic Breeze orchestrator"""
+    # Imported here rather than at module top so --help / --version don't load
+    # openai, mtkresearch and the tool backends
+    from agentic_breeze.agents.orchestrator import Orchestrator
+    from agentic_breeze.llm.llm_client import LLMConnector
+    from agentic_breeze.prompts.prompt_manager import PromptManager
+    from agentic_breeze.agents.orchestrator_core.planning_manager import PlanningManager
+    from agentic_breeze.agents.orchestrator_core.tool_executor import ToolExecutor
+    from agentic_breeze.agents.orchestrator_core.query_rewriter import QueryRewriter
+    from agentic_breeze.agents.orchestrator_core.conversation_manager import ConversationManager
+    from agentic_breeze.agents.orchestrator_core.synthesis_generator import SynthesisGenerator
+    from agentic_breeze.registry.tool_registry import get_default_registry
+    from agentic_breeze.llm.response_cache import PersistentCacheStore
+
+    # Opt-in disk cache shared across restarts and worker processes
+    cache_dir = os.getenv("BREEZE_CACHE_DIR")
+    if cache_dir:
+        cache_db = os.path.join(os.path.expanduser(cache_dir), "response_cache.db")
+        make_store = functools.partial(PersistentCacheStore, cache_db)
+    else:
+        make_store = lambda namespace: None
+
     llm_connector = LLMConnector(
         host_type=os.getenv("HOST_TYPE", "ollama"),
         timeout=int(os.getenv("TIMEOUT", "300")),
         max_tokens=int(os.getenv("MAX_TOKENS", "1000")),
-        temperature=float(os.getenv("TEMPERATURE", "0.5"))
+        temperature=float(os.getenv("TEMPERATURE", "0.5")),
+        cache_store=make_store("completion")
     )
     prompt_manager = PromptManager()
+    # Planner and executor share one registry (and its tool instances / HTTP clients)
+    tool_registry = get_default_registry()
     planning_manager = PlanningManager(
         llm_client=llm_connector,
-        tool_registry=ToolRegistry(),
+        tool_registry=tool_registry,
         prompt_manager=prompt_manager
     )
     tool_executor = ToolExecutor(
-        tool_registry=ToolRegistry(),
+        tool_registry=tool_registry,
     )
     query_rewriter = QueryRewriter(
         llm_client=llm_connector,
-        prompt_manager=prompt_manager
+        prompt_manager=prompt_manager,
+        cache_store=make_store("rewrite")
     )
     conversation_manager = ConversationManager(
         llm_client=llm_connector
     )
     synthesis_generator = SynthesisGenerator(
         llm_client=llm_connector,
-        prompt_manager=prompt_manager
+        prompt_manager=prompt_manager,
+        cache_store=make_store("synthesis")
     )
 
     return Orchestrator(
@@ -56,6 +83,12 @@ def create_orchestrator():
     )
 
 
+@functools.lru_cache(maxsize=1)
+def get_orchestrator():
+    """Return the process-wide orchestrator, building it on first use"""
+    return create_orchestrator()
+
+
 def run_web_interface():
     """Launch the Gradio web interface"""
     try:
@@ -63,30 +96,34 @@ def run_web_interface():
         from dotenv import load_dotenv
         load_dotenv()
         
-        orchestrator = create_orchestrator()
+        orchestrator = get_orchestrator()
         
         def chat_interface(user_message, history):
-            if not history:
-                history = []
-            
             # Gradio history format is List[List[str, str]] where inner list is [user_message, bot_message]
-            # Our orchestrator expects List[Dict[str, str]]
-            formatted_history = []
-            for human, assistant in history:
-                formatted_history.append({"role": "user", "content": human})
-                formatted_history.append({"role": "assistant", "content": assistant})
+            # Our orchestrator expects List[Dict[str, str]]; only the recent turns are converted so
+            # per-message work stays bounded however long the session gets
+            formatted_history = [
+                message
+                for human, assistant in (history or [])[-_WEB_HISTORY_TURNS:]
+                for message in ({"role": "user", "content": human}, {"role": "assistant", "content": assistant})
+            ]
 
             # Try streaming first, fallback to non-streaming
             try:
-                full_reply = ""
+                parts = []
+                last_yield = time.monotonic()
                 for chunk in orchestrator.aquery_with_history_stream(user_message, formatted_history):
                     if chunk:
-                        full_reply += chunk
-                        # Yield partial response for streaming effect
-                        yield full_reply
+                        parts.append(chunk)
+                        # Yield partial response for streaming effect, at most ~30 updates/s:
+                        # each yield re-sends and re-renders the whole reply
+                        now = time.monotonic()
+                        if now - last_yield >= _WEB_STREAM_INTERVAL:
+                            last_yield = now
+                            yield "".join(parts)
                 
                 # Final yield with complete response
-                yield full_reply
+                yield "".join(parts)
                 
             except Exception as e:
                 # Fallback to non-streaming
@@ -105,62 +142,97 @@ def run_web_interface():
                 ["台北夜市知名小吃"],
                 ["規劃宜蘭週末旅行"],
             ]
+        ).queue(
+            # Let several sessions' LLM/tool round-trips overlap instead of running one at a time
+            default_concurrency_limit=int(os.getenv("BREEZE_CONCURRENCY", "8")),
+            max_size=64,
         ).launch()
     except ImportError:
         print("Error: gradio is required for web interface. Install with: pip install gradio")
         sys.exit(1)
 
 
+def _iter_user_inputs():
+    """Yield user input lines: prompt with input() on a TTY, iterate stdin directly when piped"""
+    if sys.stdin.isatty():
+        while True:
+            try:
+                yield input("\n你: ")
+            except EOFError:
+                return
+    else:
+        for line in sys.stdin:
+            yield line.rstrip("\n")
+
+
 def run_chat():
     """Run interactive chat mode"""
     try:
         from dotenv import load_dotenv
         load_dotenv()
         
-        orchestrator = create_orchestrator()
+        orchestrator = get_orchestrator()
         
         print("=== Agentic Breeze 智慧助理 CLI ===")
         print("輸入 'exit' 或 'quit' 結束對話")
         print("-" * 40)
         
-        history = []
+        # Orchestrator only keeps the last 20 sanitized messages; bound the raw history with
+        # some headroom for entries sanitize_history drops, instead of growing it forever
+        history = deque(maxlen=40)
         
-        while True:
-            try:
-                user_input = input("\n你: ").strip()
-                
-                if user_input.lower() in ['exit', 'quit', '退出']:
-                    print("\n再見！")
-                    break
-                
-                if not user_input:
-                    continue
-                
-                # Get streaming response from orchestrator
-                print(f"\nAgentic Breeze: ", end="", flush=True)
-                full_reply = ""
-                
+        try:
+            for line in _iter_user_inputs():
                 try:
-                    for chunk in orchestrator.aquery_with_history_stream(user_input, history):
-                        if chunk:
-                            print(chunk, end="", flush=True)
-                            full_reply += chunk
-                    print()  # New line after streaming complete
+                    user_input = line.strip()
+                    
+                    if user_input.lower() in ['exit', 'quit', '退出']:
+                        print("\n再見！")
+                        break
+                    
+                    if not user_input:
+                        continue
+                    
+                    # Get streaming response from orchestrator
+                    print(f"\nAgentic Breeze: ", end="", flush=True)
+                    parts = []
+                    
+                    try:
+                        # Write tokens in small batches (on newline or every ~30 ms) rather than one
+                        # write + flush syscall per token
+                        pending = []
+                        last_flush = time.monotonic()
+                        for chunk in orchestrator.aquery_with_history_stream(user_input, history):
+                            if chunk:
+                                parts.append(chunk)
+                                pending.append(chunk)
+                                now = time.monotonic()
+                                if "\n" in chunk or now - last_flush >= _CLI_FLUSH_INTERVAL:
+                                    sys.stdout.write("".join(pending))
+                                    sys.stdout.flush()
+                                    pending.clear()
+                                    last_flush = now
+                        if pending:
+                            sys.stdout.write("".join(pending))
+                        print()  # New line after streaming complete
+                        full_reply = "".join(parts)
+                    except Exception as e:
+                        # Fallback to non-streaming if streaming fails
+                        print(f"串流模式失敗，切換至一般模式: {e}")
+                        full_reply = orchestrator.aquery_with_history(user_input, history)
+                        print(full_reply)
+                    
+                    # Update history
+                    history.append({"role": "user", "content": user_input})
+                    history.append({"role": "assistant", "content": full_reply})
+                    
                 except Exception as e:
-                    # Fallback to non-streaming if streaming fails
-                    print(f"串流模式失敗，切換至一般模式: {e}")
-                    full_reply = orchestrator.aquery_with_history(user_input, history)
-                    print(full_reply)
-                
-                # Update history
-                history.append({"role": "user", "content": user_input})
-                history.append({"role": "assistant", "content": full_reply})
-                
-            except KeyboardInterrupt:
-                print("\n\n再見！")
-                break
-            except Exception as e:
-                print(f"\n錯誤: {e}")
+                    print(f"\n錯誤: {e}")
+            else:
+                # End of input (EOF / end of piped stdin)
+                print("\n再見！")
+        except KeyboardInterrupt:
+            print("\n\n再見！")
                 
     except ImportError as e:
         print(f"Error: Missing required dependencies: {e}")
@@ -168,8 +240,9 @@ def run_chat():
         sys.exit(1)
 
 
-def main():
-    """Main CLI entry point"""
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """Build the CLI argument parser once per process"""
     parser = argparse.ArgumentParser(
         description="Agentic Breeze - 智慧助理框架",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -189,7 +262,13 @@ def main():
     # Chat command
     chat_parser = subparsers.add_parser("chat", help="Start interactive chat")
     
-    args = parser.parse_args()
+    return parser
+
+
+def main(argv=None):
+    """Main CLI entry point"""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
     
     if args.command == "web":
         run_web_interface()
@@ -1,18 +1,41 @@
 
+import asyncio
+import datetime
+import functools
+import importlib.util
+import threading
 import time
 import uuid
+import weakref
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from mtkresearch.llm.prompt import MRPromptV3
 
+# httpx 的 HTTP/2 支援需要額外安裝 h2（httpx[http2]），未安裝時退回 HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
+# Token MRPromptV3 models emit before a tool call
+_USE_TOOL_TOKEN = "<|use_tool|>"
+
+# Number of distinct tool sets whose converted functions list is kept
+_FUNCTIONS_CACHE_SIZE = 32
+
+# Number of rendered system segments (system prompt x tool set) kept by the prompt engine
+_SYS_SEGMENT_CACHE_SIZE = 64
+
+
+# Nested wrappers (choices / delta / message) are built on first access and cached, so
+# repeated `.choices[0].message.content` lookups don't allocate new wrapper objects.
+# Leaf fields stay dict-backed: missing keys read as None and tool_calls remain plain dicts.
 class StreamingChunk:
     """Wrapper to make streaming chunks compatible with OpenAI format."""
     def __init__(self, chunk_data: Dict[str, Any]):
         self._data = chunk_data
         
-    @property
+    @functools.cached_property
     def choices(self):
         return [Choice(self._data.get('choices', [{}])[0])]
 
@@ -22,7 +45,7 @@ class Choice:
     def __init__(self, choice_data: Dict[str, Any]):
         self._data = choice_data
         
-    @property
+    @functools.cached_property
     def delta(self):
         return Delta(self._data.get('delta', {}))
     
@@ -64,7 +87,7 @@ class ResponseChoice:
     def __init__(self, choice_data: Dict[str, Any]):
         self._data = choice_data
         
-    @property
+    @functools.cached_property
     def message(self):
         return Message(self._data.get('message', {}))
     
@@ -78,7 +101,7 @@ class ChatCompletionResponse:
     def __init__(self, response_data: Dict[str, Any]):
         self._data = response_data
         
-    @property
+    @functools.cached_property
     def choices(self):
         return [ResponseChoice(choice) for choice in self._data.get('choices', [])]
     
@@ -108,8 +131,96 @@ class ChatCompletionResponse:
     def model_dump(self):
         return self._data
 
+class _PrefixCachingPromptV3(MRPromptV3):
+    """MRPromptV3 that memoizes the rendered system segment.
+
+    get_prompt() renders the system header first: the system prompt plus repr() of every
+    function schema, which is the bulk of the prompt and is identical for every call of a
+    given turn type. Only the conversation turns after it change, so the segment is cached
+    per (system prompt, functions list, date) and the per-call formatting work is limited
+    to the turns. The date is part of the key because the engine embeds today's date in
+    the segment.
+
+    The functions list is keyed by identity: BreezeClient passes the same memoized list
+    for a given tool set (see _convert_openai_tools_to_functions). Entries keep a reference
+    to it so its id can't be reused while cached.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sys_segments: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (functions, segment)
+        self._sys_segments_lock = threading.Lock()
+
+    def _get_sys_segment(self, sys=None, functions=None, training=False):
+        key = (sys, id(functions), training, datetime.date.today())
+        with self._sys_segments_lock:
+            cached = self._sys_segments.get(key)
+            if cached is not None and cached[0] is functions:
+                self._sys_segments.move_to_end(key)
+                return cached[1]
+        segment = super()._get_sys_segment(sys=sys, functions=functions, training=training)
+        with self._sys_segments_lock:
+            self._sys_segments[key] = (functions, segment)
+            while len(self._sys_segments) > _SYS_SEGMENT_CACHE_SIZE:
+                self._sys_segments.popitem(last=False)
+        return segment
+
+
+class _StreamAssembler:
+    """Turns raw completion text deltas into OpenAI-style chunks, with <|use_tool|> detection.
+
+    Shared by the sync and async stream generators so both emit identical chunk sequences.
+    """
+    def __init__(self, client: "BreezeClient", prompt_engine: MRPromptV3, model: str):
+        self._client = client
+        self._prompt_engine = prompt_engine
+        self._model = model
+        # All chunks of one completion share id / created (as OpenAI does)
+        self._chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        self._created = int(time.time())
+        self._accumulated = []
+        self._tool_call_detected = False
+        # Only the last len(sentinel) - 1 chars can start a sentinel split across chunks,
+        # so each check scans tail + delta instead of the whole accumulated text
+        self._tail = ""
+
+    def _chunk(self, delta, finish_reason=None):
+        return StreamingChunk(self._client._create_streaming_chunk(
+            delta, self._model, self._chunk_id, self._created, finish_reason=finish_reason))
+
+    def start(self):
+        """Initial chunk carrying the assistant role."""
+        return self._chunk({'role': 'assistant', 'content': ''})
+
+    def feed(self, delta_text: str) -> Optional[StreamingChunk]:
+        """Consume one text delta; returns the content chunk to emit, or None while a tool call is buffered."""
+        self._accumulated.append(delta_text)
+        # Once in tool call mode, keep accumulating but don't send any more content chunks
+        if self._tool_call_detected:
+            return None
+        window = self._tail + delta_text
+        if _USE_TOOL_TOKEN in window:
+            # Wait for complete generation
+            self._tool_call_detected = True
+            return None
+        self._tail = window[-(len(_USE_TOOL_TOKEN) - 1):]
+        return self._chunk({'content': delta_text})
+
+    def finish(self) -> List[StreamingChunk]:
+        """Parse the accumulated text and build the closing chunk(s)."""
+        parsed_message = self._prompt_engine.parse_generated_str("".join(self._accumulated))
+        if self._tool_call_detected or "tool_calls" in parsed_message:
+            chunks = []
+            # Send tool calls as a single chunk
+            if "tool_calls" in parsed_message:
+                chunks.append(self._chunk({'tool_calls': parsed_message['tool_calls']}))
+            chunks.append(self._chunk(None, finish_reason="tool_calls"))
+            return chunks
+        return [self._chunk(None, finish_reason="stop")]
+
+
 class BreezeClient:
-    def __init__(self, host_type='ollama', api_key=None, base_url=None):
+    def __init__(self, host_type='ollama', api_key=None, base_url=None,
+                 max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0):
         if host_type == 'ollama':
             base_url = "http://localhost:11434/v1"
             api_key = "ollama"
@@ -122,8 +233,105 @@ class BreezeClient:
             self._model = None
             assert api_key and base_url
         
-        self._client = OpenAI(base_url=base_url, api_key=api_key)
-        self._prompt_engine = MRPromptV3()
+        # Persistent pooled HTTP client: planner/rewriter/synthesizer calls reuse the same
+        # TCP (+TLS) connections instead of paying a handshake per request.
+        # Local ollama/vllm endpoints are plain HTTP/1.1, so HTTP/2 is only used for remote hosts.
+        self._http = httpx.Client(
+            limits=httpx.Limits(
+                max_keepalive_connections=max_keepalive_connections,
+                max_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            http2=host_type not in ('ollama', 'vllm') and _HTTP2_AVAILABLE
+        )
+        self._client = OpenAI(base_url=base_url, api_key=api_key, http_client=self._http)
+        # Async twin for achat_completions_create: lets the orchestrator run independent LLM
+        # sub-calls concurrently on one event loop. Pooled connections are bound to the loop
+        # that opened them, so one AsyncClient/AsyncOpenAI pair is built lazily per event loop
+        # (see _async_client); a script may call asyncio.run() repeatedly on the same client.
+        self._base_url = base_url
+        self._api_key = api_key
+        self._async_http_options = dict(
+            limits=httpx.Limits(
+                max_keepalive_connections=max_keepalive_connections,
+                max_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            http2=host_type not in ('ollama', 'vllm') and _HTTP2_AVAILABLE
+        )
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+        self._aclose_tasks = set()  # keep scheduled close tasks alive until they finish
+        self._prompt_engine = _PrefixCachingPromptV3()
+        self._stop_tokens = ["<|eot_id|>"]
+        self._functions_cache: Dict[tuple, tuple] = {}  # ids of tool schemas -> (schemas, functions)
+        self._functions_lock = threading.Lock()
+
+    def close(self):
+        """Close the sync pool and every per-loop async pool. Safe to call more than once.
+
+        Inside a running event loop prefer ``await aclose()``; here that loop's async pool
+        is closed on a task scheduled on it.
+        """
+        self._http.close()
+        for loop, ahttp in self._pop_async_clients():
+            self._close_async_http(loop, ahttp)
+
+    async def aclose(self):
+        """Close all pooled HTTP clients from async code."""
+        self._http.close()
+        current = asyncio.get_running_loop()
+        for loop, ahttp in self._pop_async_clients():
+            if loop is current:
+                await ahttp.aclose()
+            else:
+                self._close_async_http(loop, ahttp)
+
+    def _async_client(self):
+        """Return the AsyncOpenAI client for the running event loop, building it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            entry = self._async_clients.get(loop)
+            if entry is None:
+                ahttp = httpx.AsyncClient(**self._async_http_options)
+                entry = (ahttp, AsyncOpenAI(base_url=self._base_url, api_key=self._api_key, http_client=ahttp))
+                self._async_clients[loop] = entry
+        return entry[1]
+
+    def _pop_async_clients(self):
+        """Detach and return (loop, AsyncClient) for every per-loop async pool."""
+        with self._async_lock:
+            entries = [(loop, ahttp) for loop, (ahttp, _) in self._async_clients.items()]
+            self._async_clients.clear()
+        return entries
+
+    def _close_async_http(self, loop, ahttp):
+        """Close an AsyncClient on the loop that owns its connections."""
+        if ahttp.is_closed or loop.is_closed():
+            # A closed loop already tore down its transports; nothing left to close gracefully
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is running:
+            task = loop.create_task(ahttp.aclose())
+            self._aclose_tasks.add(task)
+            task.add_done_callback(self._aclose_tasks.discard)
+        elif loop.is_running():
+            # Owned by an event loop in another thread
+            asyncio.run_coroutine_threadsafe(ahttp.aclose(), loop)
+        else:
+            loop.run_until_complete(ahttp.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
     
     def chat_completions_create(
         self,
@@ -137,24 +345,50 @@ class BreezeClient:
         tools=None,
         timeout=None,
     ):
+        completion_params, model = self._prepare_completion(
+            messages, model, max_tokens, temperature, top_p, stream, tools, timeout)
+        prompt_engine = self._prompt_engine
+        if stream:
+            return self._handle_streaming_response(completion_params, prompt_engine, model)
+        else:
+            return self._handle_non_streaming_response(completion_params, prompt_engine, model)
+
+    async def achat_completions_create(
+        self,
+        messages,
+        model=None,
+        max_tokens=None,
+        temperature=0.8,
+        top_p=0.5,
+        stream=False,
+        tool_choice="auto",  # Keep parameter for API compatibility
+        tools=None,
+        timeout=None,
+    ):
+        """Async version of chat_completions_create; with stream=True returns an async iterator of chunks."""
+        completion_params, model = self._prepare_completion(
+            messages, model, max_tokens, temperature, top_p, stream, tools, timeout)
+        prompt_engine = self._prompt_engine
+        if stream:
+            return self._handle_streaming_response_async(completion_params, prompt_engine, model)
+        completion = await self._async_client().completions.create(**completion_params)
+        return self._build_chat_response(completion, completion_params, prompt_engine, model)
+
+    def _prepare_completion(self, messages, model, max_tokens, temperature, top_p, stream, tools, timeout):
+        """Render messages (and tools) into the MRPromptV3 prompt and build completions params."""
         if model is None:
             model = self._model
         
         # Convert OpenAI tools to MRPromptV3 functions format
         functions = self._convert_openai_tools_to_functions(tools)
         
-        # Create MRPromptV3 instance
-        prompt_engine = MRPromptV3()
-        
         # Convert messages to prompt string
+        # (the engine built in __init__ is reused: get_prompt / parse_generated_str keep no per-call state)
         try:
-            final_prompt = prompt_engine.get_prompt(messages, functions=functions)
+            final_prompt = self._prompt_engine.get_prompt(messages, functions=functions)
         except Exception as e:
             raise ValueError(f"Error converting messages to prompt: {str(e)}")
         
-        # Estimate prompt tokens
-        prompt_tokens = self._estimate_tokens(final_prompt)
-        
         # Prepare completion parameters
         completion_params = {
             "model": model,
@@ -162,24 +396,42 @@ class BreezeClient:
             "temperature": temperature,
             "top_p": top_p,
             "stream": stream,
-            "stop": ["<|eot_id|>"]  # Stop at end of turn
+            "stop": self._stop_tokens  # Stop at end of turn
         }
         
         if max_tokens:
             completion_params["max_tokens"] = max_tokens
         if timeout:
             completion_params["timeout"] = timeout
-            
-        if stream:
-            return self._handle_streaming_response(completion_params, prompt_engine, model, prompt_tokens)
-        else:
-            return self._handle_non_streaming_response(completion_params, prompt_engine, model, prompt_tokens)
+        return completion_params, model
 
     def _convert_openai_tools_to_functions(self, tools: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
-        """Convert OpenAI tools format to MRPromptV3 functions format."""
+        """Convert OpenAI tools format to MRPromptV3 functions format.
+
+        Functions are sorted by name: MRPromptV3 renders them near the start of the prompt,
+        so a canonical order keeps that prefix byte-identical across calls regardless of the
+        order the caller passed tools in, letting the backend's prefix cache (vLLM prefix
+        caching / ollama KV reuse) match it.
+        """
         if not tools:
             return None
-            
+
+        # Memoized on the identity of the tool schema dicts: ToolRegistry hands out the same
+        # schema objects every turn (in a new list), so the conversion runs once per tool set.
+        # Entries keep references to the schemas, so their ids can't be reused while cached.
+        # Schemas are treated as immutable once passed in.
+        key = tuple(map(id, tools))
+        cached = self._functions_cache.get(key)
+        if cached is None:
+            cached = (tuple(tools), self._build_functions(tools))
+            with self._functions_lock:
+                self._functions_cache[key] = cached
+                while len(self._functions_cache) > _FUNCTIONS_CACHE_SIZE:
+                    del self._functions_cache[next(iter(self._functions_cache))]
+        return cached[1]
+
+    def _build_functions(self, tools: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Build the name-sorted MRPromptV3 functions list (uncached)."""
         functions = []
         for tool in tools:
             if tool.get('type') == 'function' and 'function' in tool:
@@ -189,19 +441,24 @@ class BreezeClient:
                     'description': func_def['description'],
                     'parameters': func_def.get('parameters')
                 })
+        functions.sort(key=lambda f: f['name'])
         return functions if functions else None
 
-    def _create_openai_response(self, generated_text: str, model: str, prompt_tokens: int, 
-                              completion_tokens: int, finish_reason: str = "stop") -> Dict[str, Any]:
-        """Create OpenAI ChatCompletion format response."""
+    def _create_openai_response(self, message: Dict[str, Any], model: str, prompt_tokens: int,
+                              completion_tokens: int, finish_reason: str = "stop",
+                              response_id: Optional[str] = None, created: Optional[int] = None) -> Dict[str, Any]:
+        """Create OpenAI ChatCompletion format response.
+
+        response_id / created default to freshly generated values when the server didn't supply them.
+        """
         return {
-            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "id": response_id or f"chatcmpl-{uuid.uuid4().hex[:24]}",
             "object": "chat.completion",
-            "created": int(time.time()),
+            "created": created or int(time.time()),
             "model": model,
             "choices": [{
                 "index": 0,
-                "message": generated_text,  # This will be replaced with parsed message
+                "message": message,
                 "finish_reason": finish_reason
             }],
             "usage": {
@@ -211,13 +468,17 @@ class BreezeClient:
             }
         }
 
-    def _create_streaming_chunk(self, delta: Optional[Dict[str, Any]], model: str, 
+    def _create_streaming_chunk(self, delta: Optional[Dict[str, Any]], model: str, chunk_id: str, created: int,
                               finish_reason: Optional[str] = None, index: int = 0) -> Dict[str, Any]:
-        """Create OpenAI ChatCompletionChunk format for streaming."""
+        """Create OpenAI ChatCompletionChunk format for streaming.
+
+        chunk_id / created are generated once per stream by the caller (as OpenAI does, all
+        chunks of one completion share them), keeping uuid4() and time() off the per-token path.
+        """
         return {
-            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "id": chunk_id,
             "object": "chat.completion.chunk",
-            "created": int(time.time()),
+            "created": created,
             "model": model,
             "choices": [{
                 "index": index,
@@ -231,16 +492,26 @@ class BreezeClient:
         return len(text.split())
 
     def _handle_non_streaming_response(self, completion_params: Dict[str, Any], 
-                                     prompt_engine: MRPromptV3, model: str, prompt_tokens: int):
+                                     prompt_engine: MRPromptV3, model: str):
         """Handle non-streaming response."""
         # Call completions API
         completion = self._client.completions.create(**completion_params)
-        
+        return self._build_chat_response(completion, completion_params, prompt_engine, model)
+
+    def _build_chat_response(self, completion, completion_params: Dict[str, Any],
+                             prompt_engine: MRPromptV3, model: str) -> ChatCompletionResponse:
+        """Parse a completions result into a ChatCompletionResponse."""
         # Get generated text
         generated_text = completion.choices[0].text.strip()
 
-        # Estimate completion tokens
-        completion_tokens = self._estimate_tokens(generated_text)
+        # Token counts: use the server-reported usage (ollama / vllm both return it) and only
+        # fall back to the rough whitespace estimate when it's missing
+        usage = getattr(completion, "usage", None)
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            prompt_tokens = self._estimate_tokens(completion_params["prompt"])
+            completion_tokens = self._estimate_tokens(generated_text)
         
         # Parse generated text using MRPromptV3
         parsed_message = prompt_engine.parse_generated_str(generated_text)
@@ -248,58 +519,51 @@ class BreezeClient:
         # Determine finish reason
         finish_reason = "tool_calls" if "tool_calls" in parsed_message else "stop"
         
-        # Create OpenAI format response
-        response = self._create_openai_response(generated_text, model, prompt_tokens, completion_tokens, finish_reason)
-        response["choices"][0]["message"] = parsed_message
-        
+        # Create OpenAI format response, reusing the id / timestamp the server already returned.
+        # The response stays a single plain dict: LLMConnector caches it via to_dict() and
+        # tool_assisted_query exposes it as "raw".
+        response = self._create_openai_response(parsed_message, model, prompt_tokens, completion_tokens, finish_reason,
+                                                response_id=getattr(completion, "id", None),
+                                                created=getattr(completion, "created", None))
         return ChatCompletionResponse(response)
 
     def _handle_streaming_response(self, completion_params: Dict[str, Any], 
-                                 prompt_engine: MRPromptV3, model: str, _prompt_tokens: int):
+                                 prompt_engine: MRPromptV3, model: str):
         """Handle streaming response with <|use_tool|> detection."""
         
         def stream_generator():
             # Call streaming completions API
             stream = self._client.completions.create(**completion_params)
-            
-            accumulated_text = ""
-            tool_call_detected = False
-            buffer = ""
+            assembler = _StreamAssembler(self, prompt_engine, model)
             
             # Send initial chunk
-            yield StreamingChunk(self._create_streaming_chunk({'role': 'assistant', 'content': ''}, model))
+            yield assembler.start()
             
             for chunk in stream:
                 if chunk.choices and chunk.choices[0].text:
-                    delta_text = chunk.choices[0].text
-                    accumulated_text += delta_text
-                    buffer += delta_text
-                    
-                    # Check for tool call token
-                    if "<|use_tool|>" in buffer and not tool_call_detected:
-                        tool_call_detected = True
-                        # Don't send any more content chunks, wait for complete generation
-                        continue
-                    
-                    # If not in tool call mode, stream normally
-                    if not tool_call_detected:
-                        yield StreamingChunk(self._create_streaming_chunk({'content': delta_text}, model))
+                    out = assembler.feed(chunk.choices[0].text)
+                    if out is not None:
+                        yield out
             
             # Process final accumulated text
-            parsed_message = prompt_engine.parse_generated_str(accumulated_text)
-            
-            if tool_call_detected or "tool_calls" in parsed_message:
-                # Send tool calls as a single chunk
-                if "tool_calls" in parsed_message:
-                    yield StreamingChunk(self._create_streaming_chunk({
-                        'tool_calls': parsed_message['tool_calls']
-                    }, model))
-                
-                # Send final chunk with finish reason
-                yield StreamingChunk(self._create_streaming_chunk(None, model, finish_reason="tool_calls"))
-            else:
-                # Send final chunk for regular completion
-                yield StreamingChunk(self._create_streaming_chunk(None, model, finish_reason="stop"))
+            yield from assembler.finish()
         
         return stream_generator()
 
+    async def _handle_streaming_response_async(self, completion_params: Dict[str, Any],
+                                               prompt_engine: MRPromptV3, model: str):
+        """Async streaming response with <|use_tool|> detection (async generator)."""
+        stream = await self._async_client().completions.create(**completion_params)
+        assembler = _StreamAssembler(self, prompt_engine, model)
+        
+        yield assembler.start()
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].text:
+                out = assembler.feed(chunk.choices[0].text)
+                if out is not None:
+                    yield out
+        
+        for out in assembler.finish():
+            yield out
+
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Optional
 
-from .breeze_client import BreezeClient
+from .breeze_client import BreezeClient, ChatCompletionResponse
+from .response_cache import PersistentCacheStore, ResponseCache
 
 
 class LLMConnector:
@@ -17,6 +18,16 @@ class LLMConnector:
         api_base_url (str): 兼容 API 的基底位址，預設為 "https://api.openai.com/v1"。
         default_model (str): 預設模型名稱，預設 "gpt-3.5-turbo"。
         timeout (int): 請求逾時秒數，預設 30。
+        cache_size (int): 非串流回應快取的最大筆數，設為 0 表示停用快取，預設 256。
+        cache_ttl (Optional[float]): 快取項目的存活秒數，None 表示不過期。
+        cache_max_temperature (float): 僅快取取樣溫度不高於此值的請求（結果近乎決定性），預設 0.3。
+        client (Optional[BreezeClient]): 預先建立的 BreezeClient；提供時忽略 host_type，
+            讓多個連線器共用同一個連線池。
+        cache_store (Optional[PersistentCacheStore]): 選用的磁碟快取，讓回應快取跨重啟與行程共用。
+
+    執行緒安全：
+        同一個實例可在多個執行緒（或以 *_async 方法在多個協程）間共用：
+        BreezeClient 的 HTTP 連線池與回應快取皆可並行存取。
 
     例外情況：
         ValueError: 初始化或方法參數不合法。
@@ -49,13 +60,159 @@ class LLMConnector:
         timeout: int = 30,
         max_tokens: int = 1000,
         temperature: float = 0.5,
+        cache_size: int = 256,
+        cache_ttl: Optional[float] = None,
+        cache_max_temperature: float = 0.3,
+        client: Optional[BreezeClient] = None,
+        cache_store: Optional[PersistentCacheStore] = None,
     ) -> None:
 
-        self._client: BreezeClient = BreezeClient(host_type=host_type)
+        self._client: BreezeClient = client if client is not None else BreezeClient(host_type=host_type)
         self._default_model: str = self._client._model
         self._timeout: int = timeout
         self._max_tokens: int = max_tokens
         self._temperature: float = temperature
+        self._cache: ResponseCache = ResponseCache(maxsize=cache_size, ttl=cache_ttl, store=cache_store)
+        self._cache_max_temperature: float = cache_max_temperature
+
+    def clear_cache(self) -> None:
+        """清空非串流回應快取。
+
+        Examples:
+            >>> connector = LLMConnector()
+            >>> connector.clear_cache()
+        """
+        self._cache.clear()
+
+    def close(self) -> None:
+        """關閉底層客戶端的 HTTP 連線池；重複呼叫將被忽略。
+
+        Examples:
+            >>> connector = LLMConnector()
+            >>> connector.close()
+        """
+        self._client.close()
+
+    def _completion_cache_key(self, params: Dict[str, Any]) -> Optional[str]:
+        """計算非串流請求的快取鍵；請求不適合快取時回傳 None。
+
+        Args:
+            params (Dict[str, Any]): 傳給 `BreezeClient.chat_completions_create` 的參數。
+
+        Returns:
+            Optional[str]: 快取鍵；未指定溫度或溫度高於門檻時為 None。
+        """
+        temperature = params.get("temperature")
+        # 未指定溫度時由服務端預設（通常較高），結果不具決定性，不予快取
+        if temperature is None or temperature > self._cache_max_temperature:
+            return None
+        # 逾時設定不影響回應內容，不納入快取鍵
+        return ResponseCache.make_key({k: v for k, v in params.items() if k != "timeout"})
+
+    def _create_completion(self, params: Dict[str, Any]) -> ChatCompletionResponse:
+        """呼叫非串流 chat completion；低溫度請求先查詢回應快取，未命中才呼叫模型並寫入快取。
+
+        Args:
+            params (Dict[str, Any]): 傳給 `BreezeClient.chat_completions_create` 的參數（stream 需為 False）。
+
+        Returns:
+            ChatCompletionResponse: 模型回應（命中快取時由快取的回應字典重建）。
+        """
+        cache_key = self._completion_cache_key(params)
+        if cache_key is None:
+            return self._client.chat_completions_create(**params)
+
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return ChatCompletionResponse(cached)
+
+        resp = self._client.chat_completions_create(**params)
+        self._cache.set(cache_key, resp.to_dict())
+        return resp
+
+    async def _create_completion_async(self, params: Dict[str, Any]) -> ChatCompletionResponse:
+        """`_create_completion` 的非同步版本，經由 `BreezeClient.achat_completions_create` 呼叫，與同步路徑共用回應快取。
+
+        Args:
+            params (Dict[str, Any]): 傳給 `BreezeClient.achat_completions_create` 的參數（stream 需為 False）。
+
+        Returns:
+            ChatCompletionResponse: 模型回應（命中快取時由快取的回應字典重建）。
+        """
+        cache_key = self._completion_cache_key(params)
+        if cache_key is None:
+            return await self._client.achat_completions_create(**params)
+
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return ChatCompletionResponse(cached)
+
+        resp = await self._client.achat_completions_create(**params)
+        self._cache.set(cache_key, resp.to_dict())
+        return resp
+
+    def _single_query_params(
+        self,
+        prompt: str,
+        model: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        system_prompt: Optional[str],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """檢查單次對答的輸入並組成呼叫參數（同步、非同步與串流版本共用）。
+
+        Raises:
+            ValueError: 當 `prompt` 為空或 `max_tokens` 不合法。
+        """
+        if not prompt or not isinstance(prompt, str):
+            raise ValueError("prompt 不可為空，且需為字串。")
+        if max_tokens is not None and max_tokens <= 0:
+            raise ValueError("max_tokens 必須為正整數。")
+
+        messages: List[Dict[str, str]] = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        return {
+            "model": model or self._default_model,
+            "messages": messages,
+            "max_tokens": max_tokens or self._max_tokens,
+            # 以 is None 判斷，明確指定的 0.0（貪婪解碼）不會被預設值取代
+            "temperature": self._temperature if temperature is None else temperature,
+            "timeout": self._timeout,
+            "stream": stream,
+        }
+
+    def _history_params(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """檢查歷史訊息對答的輸入並組成呼叫參數（同步、非同步與串流版本共用）。
+
+        Raises:
+            ValueError: 當 `messages` 為空或不是列表。
+        """
+        if not messages or not isinstance(messages, list):
+            raise ValueError("messages 不可為空，且需為列表。")
+
+        params: Dict[str, Any] = {
+            "model": model or self._default_model,
+            "messages": messages,
+            "timeout": self._timeout,
+            "stream": stream,
+        }
+        # 未指定的選用參數不傳遞，交由服務端預設
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        return params
 
     def single_query(
         self,
@@ -87,23 +244,8 @@ class LLMConnector:
             ValueError: 當 `prompt` 為空或參數不合法。
             requests.RequestException: 當請求或回應發生錯誤。
         """
-        if not prompt or not isinstance(prompt, str):
-            raise ValueError("prompt 不可為空，且需為字串。")
-        if max_tokens is not None and max_tokens <= 0:
-            raise ValueError("max_tokens 必須為正整數。")
-
-        messages: List[Dict[str, str]] = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        resp = self._client.chat_completions_create(
-            model=model or self._default_model,
-            messages=messages,
-            max_tokens=max_tokens or self._max_tokens,
-            temperature=temperature or self._temperature,
-            timeout=self._timeout,
-            stream=False,
+        resp = self._create_completion(
+            self._single_query_params(prompt, model, max_tokens, temperature, system_prompt, stream=False)
         )
         msg = resp.choices[0].message
         return msg.content or ""
@@ -137,22 +279,73 @@ class LLMConnector:
             ValueError: 當 `messages` 為空或結構不合法。
             requests.RequestException: 當請求或回應發生錯誤。
         """
-        if not messages or not isinstance(messages, list):
-            raise ValueError("messages 不可為空，且需為列表。")
-
-        params: Dict[str, Any] = {
-            "model": model or self._default_model,
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "timeout": self._timeout,
-        }
-        # Ensure stream is False for both methods
-        params["stream"] = False
-        resp = self._client.chat_completions_create(**{k: v for k, v in params.items() if v is not None})
+        resp = self._create_completion(
+            self._history_params(messages, model, max_tokens, temperature, stream=False)
+        )
         msg = resp.choices[0].message
         return msg.content or ""
 
+    async def single_query_async(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """`single_query` 的非同步版本：走 BreezeClient 的原生非同步 HTTP 路徑，
+        多個 LLM 呼叫可在同一事件迴圈中以 asyncio.gather 並行，不佔用工作執行緒。
+        非同步連線池依事件迴圈各自建立，可在不同的 asyncio.run() 中重複呼叫。
+
+        Args:
+            prompt (str): 使用者提示內容，不可為空。
+            model (Optional[str]): 模型名稱；預設使用初始化的 `default_model`。
+            max_tokens (Optional[int]): 限制生成的最大 token 數量；可不填由伺服器預設。
+            temperature (Optional[float]): 取樣溫度；可不填由伺服器預設。
+            system_prompt (Optional[str]): 系統提示，可用來規範助手行為。
+
+        Returns:
+            str: 助手生成的文字內容。
+
+        Examples:
+            >>> connector = LLMConnector()
+            >>> a, b = await asyncio.gather(connector.single_query_async("問題一"), connector.single_query_async("問題二"))
+        """
+        resp = await self._create_completion_async(
+            self._single_query_params(prompt, model, max_tokens, temperature, system_prompt, stream=False)
+        )
+        return resp.choices[0].message.content or ""
+
+    async def chat_with_history_async(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """`chat_with_history` 的非同步版本：走原生非同步 HTTP 路徑，可與其他 LLM 呼叫並行。
+        非同步連線池依事件迴圈各自建立，可在不同的 asyncio.run() 中重複呼叫。
+
+        Args:
+            messages (List[Dict[str, str]]): 對話歷史，需符合 OpenAI Chat 格式。
+            model (Optional[str]): 模型名稱；預設使用初始化的 `default_model`。
+            max_tokens (Optional[int]): 限制生成的最大 token 數量；可不填由伺服器預設。
+            temperature (Optional[float]): 取樣溫度；可不填由伺服器預設。
+
+        Returns:
+            str: 助手生成的文字內容。
+
+        Examples:
+            >>> connector = LLMConnector()
+            >>> text = await connector.chat_with_history_async([{"role": "user", "content": "今天天氣如何？"}])
+        """
+        resp = await self._create_completion_async(
+            self._history_params(messages, model, max_tokens, temperature, stream=False)
+        )
+        return resp.choices[0].message.content or ""
+
     def tool_assisted_query(
         self,
         messages: List[Dict[str, Any]],
@@ -211,14 +404,17 @@ class LLMConnector:
             "model": model or self._default_model,
             "messages": messages,
             "tools": tools,
-            "tool_choice": tool_choice,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
             "timeout": self._timeout,
+            "stream": False,
         }
-        # Ensure stream is False for both methods
-        params["stream"] = False
-        resp = self._client.chat_completions_create(**{k: v for k, v in params.items() if v is not None})
+        # 未指定的選用參數不傳遞，交由服務端預設
+        if tool_choice is not None:
+            params["tool_choice"] = tool_choice
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        resp = self._create_completion(params)
 
         msg = resp.choices[0].message
         content = msg.content if isinstance(msg.content, str) else None
@@ -255,26 +451,9 @@ class LLMConnector:
         Yields:
             串流 chunk 物件，包含逐步生成的內容。
         """
-        if not prompt or not isinstance(prompt, str):
-            raise ValueError("prompt 不可為空，且需為字串。")
-        if max_tokens is not None and max_tokens <= 0:
-            raise ValueError("max_tokens 必須為正整數。")
-
-        messages: List[Dict[str, str]] = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        stream = self._client.chat_completions_create(
-            model=model or self._default_model,
-            messages=messages,
-            max_tokens=max_tokens or self._max_tokens,
-            temperature=temperature or self._temperature,
-            timeout=self._timeout,
-            stream=True,
+        return self._client.chat_completions_create(
+            **self._single_query_params(prompt, model, max_tokens, temperature, system_prompt, stream=True)
         )
-        
-        return stream
 
     def chat_with_history_stream(
         self,
@@ -295,17 +474,6 @@ class LLMConnector:
         Yields:
             串流 chunk 物件，包含逐步生成的內容。
         """
-        if not messages or not isinstance(messages, list):
-            raise ValueError("messages 不可為空，且需為列表。")
-
-        params: Dict[str, Any] = {
-            "model": model or self._default_model,
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "timeout": self._timeout,
-            "stream": True,
-        }
-        
-        stream = self._client.chat_completions_create(**{k: v for k, v in params.items() if v is not None})
-        return stream
+        return self._client.chat_completions_create(
+            **self._history_params(messages, model, max_tokens, temperature, stream=True)
+        )
@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用相依套件，未安裝時退回標準函式庫 json
+    orjson = None
+
+
+class PersistentCacheStore:
+    """以本機 SQLite 檔案保存快取項目，讓重新啟動或其他行程也能命中先前的結果。
+
+    讀取為同步查詢；寫入交由單一背景執行緒（write-behind）完成，不阻塞回應路徑。
+    多個 store 可共用同一個檔案，以 namespace 區隔各自的項目。值以 JSON 保存，
+    無法序列化的值只保留在記憶體快取中。
+
+    初始化參數：
+        path (str): SQLite 檔案路徑，所在目錄不存在時會自動建立。
+        namespace (str): 項目所屬的命名空間（例如 "rewrite"、"synthesis"）。
+
+    使用範例：
+        >>> store = PersistentCacheStore("~/.breeze_cache/response_cache.db", namespace="rewrite")
+        >>> cache = ResponseCache(maxsize=1024, store=store)
+        >>> store.close()
+    """
+
+    def __init__(self, path: str, namespace: str = "default") -> None:
+        path = os.path.expanduser(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._namespace = namespace
+        # 連線由呼叫端執行緒與背景寫入執行緒共用，所有存取皆以此鎖序列化
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache")
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, stored_at REAL NOT NULL, value BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _loads(blob: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(blob)
+        return json.loads(blob)
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Tuple[float, Any]]:
+        """查詢磁碟上的項目；過期項目會被刪除。
+
+        Args:
+            key (str): 快取鍵。
+            ttl (Optional[float]): 存活秒數，None 表示不過期。
+
+        Returns:
+            Optional[Tuple[float, Any]]: (項目已存在的秒數, 值)，未命中時為 None。
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT stored_at, value FROM response_cache WHERE namespace=? AND key=?",
+                    (self._namespace, key),
+                ).fetchone()
+                if row is None:
+                    return None
+                age = max(0.0, time.time() - row[0])
+                if ttl is not None and age > ttl:
+                    self._conn.execute(
+                        "DELETE FROM response_cache WHERE namespace=? AND key=?", (self._namespace, key)
+                    )
+                    return None
+            return age, self._loads(row[1])
+        except (sqlite3.Error, ValueError):
+            # 磁碟快取只是加速手段，讀取失敗視同未命中
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """排入背景寫入；值在呼叫端執行緒先序列化，之後對原物件的修改不影響已保存的內容。
+
+        Args:
+            key (str): 快取鍵。
+            value (Any): 可 JSON 序列化的值。
+        """
+        try:
+            blob = self._dumps(value)
+        except (TypeError, ValueError):
+            return
+        try:
+            self._writer.submit(self._write, key, blob, time.time())
+        except RuntimeError:  # 已 close()
+            pass
+
+    def _write(self, key: str, blob: bytes, stored_at: float) -> None:
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (namespace, key, stored_at, value) VALUES (?, ?, ?, ?)",
+                    (self._namespace, key, stored_at, blob),
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        """刪除此命名空間的所有項目（排在尚未完成的寫入之後執行）。"""
+        try:
+            self._writer.submit(self._clear).result()
+        except RuntimeError:  # 已 close()
+            pass
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache WHERE namespace=?", (self._namespace,))
+
+    def close(self) -> None:
+        """等待尚未完成的寫入後關閉連線；重複呼叫將被忽略。"""
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """行程內的 LLM 回應快取（LRU，可設定 TTL，執行緒安全）。
+
+    以請求內容的雜湊值為鍵，保存可重複使用的回應，讓相同請求不必再經過
+    提示詞轉換、HTTP 往返與模型生成。
+
+    初始化參數：
+        maxsize (int): 快取的最大筆數，設為 0 表示停用快取。
+        ttl (Optional[float]): 快取項目的存活秒數，None 表示不過期。
+        store (Optional[PersistentCacheStore]): 選用的磁碟快取；記憶體未命中時改查磁碟，
+            寫入時同步排入背景寫入。None 表示只使用行程內快取。
+
+    使用範例：
+        >>> cache = ResponseCache(maxsize=128, ttl=600)
+        >>> key = ResponseCache.make_key({"model": "m", "messages": [{"role": "user", "content": "你好"}]})
+        >>> cache.get(key) is None
+        True
+        >>> cache.set(key, {"choices": []})
+        >>> cache.get(key)
+        {'choices': []}
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None,
+                 store: Optional[PersistentCacheStore] = None) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be a non-negative integer")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._store = store
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict() # key -> (寫入時間, 值)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(payload: Any) -> str:
+        """以穩定的 JSON 序列化（排序鍵）計算請求內容的雜湊值作為快取鍵。
+
+        Args:
+            payload (Any): 可 JSON 序列化的請求內容（非標準型別以 str() 表示）。
+
+        Returns:
+            str: 32 字元的十六進位雜湊值。
+        """
+        if orjson is not None:
+            # C 實作的序列化直接產生 bytes，省去 json 編碼器與再次 encode 的成本
+            serialized = orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        else:
+            serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """查詢快取；命中時將項目移至最近使用位置，過期項目會被移除。
+        記憶體未命中且設定了磁碟快取時，改查磁碟並將結果放回記憶體。
+
+        Args:
+            key (str): 快取鍵。
+            ttl (Optional[float]): 本次查詢採用的存活秒數，None 表示沿用初始化時的設定。
+
+        Returns:
+            Optional[Any]: 快取的值，未命中時為 None。
+        """
+        if self._maxsize == 0:
+            return None
+        if ttl is None:
+            ttl = self._ttl
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if ttl is None or time.monotonic() - stored_at <= ttl:
+                    self._data.move_to_end(key)
+                    return value
+                del self._data[key]
+        if self._store is None:
+            return None
+        # 磁碟查詢不持有記憶體快取的鎖，避免阻塞其他執行緒
+        found = self._store.get(key, ttl)
+        if found is None:
+            return None
+        age, value = found
+        # 保留磁碟上的寫入時間，TTL 不因載入記憶體而延長
+        self._put(key, value, time.monotonic() - age)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """寫入快取；超過上限時淘汰最久未使用的項目。
+
+        Args:
+            key (str): 快取鍵。
+            value (Any): 要快取的值。
+        """
+        if self._maxsize == 0:
+            return
+        self._put(key, value, time.monotonic())
+        if self._store is not None:
+            self._store.set(key, value)
+
+    def _put(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._data[key] = (stored_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空所有快取項目（含磁碟快取中同一命名空間的項目）。"""
+        with self._lock:
+            self._data.clear()
+        if self._store is not None:
+            self._store.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,8 +1,39 @@
 
+import functools
 import json
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, FrozenSet, Tuple
 import os
 
+try:
+    import orjson
+except ImportError:  # orjson 為選用相依套件，未安裝時退回標準函式庫 json
+    orjson = None
+
+# 對話歷史轉文字時的角色顯示名稱；其他角色一律顯示為「助理」
+_ROLE_NAMES = {"user": "使用者", "assistant": "助理"}
+
+
+@functools.lru_cache(maxsize=8)
+def _load_prompt_config(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    讀取並解析提示詞配置檔。
+
+    以 (路徑, 修改時間) 為鍵快取，同一行程內的多個 PromptManager 共用同一份
+    解析結果；檔案更新後修改時間改變，下次載入即重新讀取。回傳的字典為共用
+    物件，呼叫端不應修改。
+
+    Args:
+        path: str, 配置檔案的絕對路徑。
+        mtime_ns: int, 檔案修改時間（奈秒），僅作為快取鍵。
+
+    Returns:
+        Dict[str, Any]: 解析後的配置內容。
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
 
 class PromptManager:
     """
@@ -23,24 +54,32 @@ class PromptManager:
             FileNotFoundError: 提示詞配置檔案不存在。
         """
         self.config_path = os.path.join(os.path.dirname(__file__), config_path)
+        # 工具清單描述快取：鍵為 (工具名稱, 描述) 序列，工具註冊內容改變時自然對應到新鍵
+        self._tools_desc_cache: Dict[Tuple[Tuple[str, str], ...], str] = {}
+        # 每個實例各自的專業綜合提示詞記憶化（工具組合的數量有限）
+        self._expert_block = functools.lru_cache(maxsize=64)(self._build_expert_block)
         self._load_prompts()
 
     def _load_prompts(self):
         """
         從配置檔案載入提示詞。
         """
-        if not os.path.exists(self.config_path):
-            raise FileNotFoundError(f"Prompt configuration file not found at {self.config_path}")
+        try:
+            mtime_ns = os.stat(self.config_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Prompt configuration file not found at {self.config_path}") from None
         
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
+        config_data = _load_prompt_config(self.config_path, mtime_ns)
         
-        self.expert_prompts = config_data.get("expert_prompts", {})
+        # JSON 解析出的鍵是新建字串，常駐後與程式中的工具名稱共用同一物件
+        self.expert_prompts = {sys.intern(k): v for k, v in config_data.get("expert_prompts", {}).items()}
         self.common_prompts = config_data.get("common_prompts", [])
+        # 共用提示詞載入後不再變動，預先合併為單一字串區塊
+        self._common_block = "\n".join(self.common_prompts)
     
     def build_planning_prompt(self, question: str, tool_schemas: List[Any]) -> str:
         """
-        構建規劃階段的提示詞。
+        構建規劃階段的提示詞：固定的系統提示詞在前，使用者問題附加在最後。
         
         Args:
             question: str, 使用者問題。
@@ -55,30 +94,67 @@ class PromptManager:
             >>> print(prompt)
             "你是AI助理，負責分析使用者問題並選擇最合適的工具組合..."
         """
-        tools_description = "\n".join([
-            f"- {schema['function']['name']}: {schema['function']['description']}"
-            for schema in tool_schemas
-        ])
+        return f"{self.build_planning_system_prompt(tool_schemas)}\n\n=== 使用者問題 ===\n{question}\n"
+    
+    def build_planning_system_prompt(self, tool_schemas: List[Any]) -> str:
+        """
+        構建規劃階段的系統提示詞（角色、工具清單與呼叫規則），不含使用者問題。
+        
+        相同工具組合產生逐位元組一致的內容，使用者問題應放在之後的 user 訊息，
+        讓推論端的前綴快取可跨請求重用。
+        
+        Args:
+            tool_schemas: List[Any], 可用工具的 schema 列表。
+            
+        Returns:
+            str: 規劃系統提示詞。
+            
+        Examples:
+            >>> prompt_manager = PromptManager()
+            >>> system_prompt = prompt_manager.build_planning_system_prompt(tool_schemas)
+            >>> messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": "今天天氣如何？"}]
+        """
+        tools_description = self._tools_description(tool_schemas)
 
-        prompt = f"""
-        你是AI助理，負責分析使用者問題並選擇最合適的工具組合。
+        return f"""你是AI助理，負責分析使用者問題並選擇最合適的工具組合。
 
-        === 可用工具 ===
-        {tools_description}
+=== 可用工具 ===
+{tools_description}
 
-        === 使用者問題 ===
-        {question}
+=== 工具呼叫規則 ===
+依據使用者問題判斷，如果需要調用多個工具，使用 planner規劃方式，planner非工具名稱，而是會回傳一個包含工具名稱和參數的列表： 
 
-        === 工具呼叫規則 ===
-        依據使用者問題判斷，如果需要調用多個工具，使用 planner規劃方式，planner非工具名稱，而是會回傳一個包含工具名稱和參數的列表： 
+planner(plan=[
+    {{"tool_name": "第1個工具", "parameters": {{參數}}}},
+    {{"tool_name": "第2個工具", "parameters": {{參數}}}}
+])"""
+    
+    def _tools_description(self, tool_schemas: List[Any]) -> str:
+        """
+        取得工具清單描述文字；工具組合不變時直接回傳快取的字串，不重新組合。
         
-        planner(plan=[
-            {{"tool_name": "第1個工具", "parameters": {{參數}}}},
-            {{"tool_name": "第2個工具", "parameters": {{參數}}}}
-        ])
+        Args:
+            tool_schemas: List[Any], 可用工具的 schema 列表。
+            
+        Returns:
+            str: 每行一個工具的 "- 名稱: 描述" 文字。
         """
-
-        return prompt
+        key = tuple((schema['function']['name'], schema['function']['description']) for schema in tool_schemas)
+        description = self._tools_desc_cache.get(key)
+        if description is None:
+            description = "\n".join(f"- {name}: {desc}" for name, desc in key)
+            self._tools_desc_cache[key] = description
+        return description
+    
+    def invalidate_tools_cache(self) -> None:
+        """
+        清空工具清單描述快取。
+        
+        Examples:
+            >>> prompt_manager = PromptManager()
+            >>> prompt_manager.invalidate_tools_cache()
+        """
+        self._tools_desc_cache.clear()
     
     def build_query_rewriter_prompt(self, history: List[Dict[str, str]], query: str) -> str:
         """
@@ -116,6 +192,42 @@ class PromptManager:
         只輸出重寫後的問句，不要加任何解釋："""
         return prompt
     
+    def build_query_rewriter_batch_prompt(self, history: List[Dict[str, str]], queries: List[str]) -> str:
+        """
+        構建批次查詢重寫的提示詞：多個獨立問句以 [idx=編號] 標示，一次交給 LLM 重寫。
+        
+        Args:
+            history: List[Dict[str, str]], 對話歷史。
+            queries: List[str], 原始查詢列表。
+            
+        Returns:
+            str: 批次查詢重寫提示詞，要求每個問句以相同的 [idx=編號] 開頭輸出。
+            
+        Examples:
+            >>> prompt_manager = PromptManager()
+            >>> prompt = prompt_manager.build_query_rewriter_batch_prompt([], ["台北天氣？", "台中天氣？"])
+            >>> "[idx=2] 台中天氣？" in prompt
+            True
+        """
+        history_text = self._history_to_text(history) if history else "無對話歷史"
+        queries_text = "\n".join(f"[idx={i}] {query}" for i, query in enumerate(queries, 1))
+        
+        return f"""你是一位專業的問句重寫助理。請根據對話歷史，將下列每一個問句分別重寫得更清楚、更具體。
+
+對話歷史：
+{history_text}
+
+原始問句：
+{queries_text}
+
+請重寫每一個問句，使其：
+1. 更加清楚明確
+2. 包含必要的背景資訊
+3. 適合進行查詢和工具呼叫
+4. 保持原意不變
+
+每個問句輸出一行，以對應的 [idx=編號] 開頭，依編號順序輸出，不要加任何解釋："""
+    
     def build_synthesis_prompt(self, 
                                original_question: str, 
                                execution_results: List[str],
@@ -154,37 +266,58 @@ class PromptManager:
         # 組合專業提示詞
         expert_synthesis_instructions = self._compose_expert_synthesis_prompt(used_tools)
         
-        return f"""
-        {expert_synthesis_instructions}
+        # 固定內容在前、使用者問題在後，讓相同工具組合的提示詞前綴逐位元組一致，
+        # 以利推論端的前綴 KV 快取命中
+        return f"""{expert_synthesis_instructions}
 
-        原始問題：{original_question}
+背景資料：
+{results_text}
 
-        背景資料：
-        {results_text}
+原始問題：{original_question}
 
-        請根據以上背景資料，生成一個完整、親切的答案。
-        """
+請根據以上背景資料，生成一個完整、親切的答案。
+"""
     
     def _compose_expert_synthesis_prompt(self, used_tools: List[str]) -> str:
         """
         通用提示詞組合專業綜合提示詞。
         
+        組合結果只取決於工具集合與是否為多工具，依此記憶化，
+        常見的工具組合不再重複查表與組字串。
+        
         Args:
             used_tools: List[str], 實際執行過的工具名稱列表
             
         Returns:
             str: 組合後的專業提示詞。
         """
-        prompt_parts = []
-        prompt_parts.extend(self.common_prompts)
+        return self._expert_block(frozenset(used_tools), len(used_tools) > 1)
+    
+    def _build_expert_block(self, tools: FrozenSet[str], multi_tool: bool) -> str:
+        """
+        組合專業綜合提示詞（未記憶化）。參數皆為可雜湊型別，以便透過 lru_cache 記憶化。
+        
+        Args:
+            tools: FrozenSet[str], 實際執行過的工具名稱集合
+            multi_tool: bool, 是否執行了多次工具調用
+            
+        Returns:
+            str: 組合後的專業提示詞。
+        """
+        prompt_parts = [self._common_block] if self.common_prompts else []
         
-        if len(used_tools) > 1:
+        if multi_tool:
             prompt_parts.append("你需要整合多個工具的資訊，提供一個完整、親切的完整回答。")
             prompt_parts.append("")
             
-        for tool in used_tools:
-            if tool in self.expert_prompts:
-                prompt_parts.append(self.expert_prompts[tool])
+        # 以排序後的工具名稱組合，確保相同工具組合產生相同的提示詞；
+        # 多個工具共用相同的專業提示詞時只放入一次，避免重複佔用提示詞 token
+        seen = set()
+        for tool in sorted(tools):
+            expert_prompt = self.expert_prompts.get(tool)
+            if expert_prompt is not None and expert_prompt not in seen:
+                seen.add(expert_prompt)
+                prompt_parts.append(expert_prompt)
                 prompt_parts.append("")
         
         return "\n".join(prompt_parts)
@@ -207,10 +340,10 @@ class PromptManager:
             "使用者: 你好\\n助理: 您好"
         """
         lines: List[str] = []
-        role_map = {"user": "使用者", "assistant": "助理"}
+        append = lines.append
         for m in history:
-            role = role_map.get(m.get("role", ""), "助理")
             content = m.get("content", "").strip()
             if content:
-                lines.append(f"{role}: {content}")
+                # 只為保留的訊息查角色名稱；角色對照表為模組常數，不在每次呼叫重建
+                append(f"{_ROLE_NAMES.get(m.get('role'), '助理')}: {content}")
         return "\n".join(lines)
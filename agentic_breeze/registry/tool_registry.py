@@ -1,13 +1,64 @@
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import asyncio
+import functools
+import inspect
 import json
-from agentic_breeze.agents.orchestrator_core.tools.sqlite_tool import SQLiteSchemaTool
-from agentic_breeze.agents.orchestrator_core.tools.weather import CWAWeatherTool
-from agentic_breeze.agents.orchestrator_core.tools.wiki_tool import WikiTool
-from agentic_breeze.agents.orchestrator_core.tools.api_tool import APIRequestTool
+import sys
+import types
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用相依套件，未安裝時退回標準函式庫 json
+    orjson = None
 
 # 錯誤訊息前綴，提供一致且可辨識的錯誤格式。
 ERROR_PREFIX = "[ToolError]"
 
+# 例外類型 -> 錯誤訊息中的錯誤分類（依序比對，未列出者為「執行例外」）
+# TypeError 常見於參數不符或缺少必填參數；ValueError 保留給參數驗證（JSON Schema/Pydantic）
+_ERROR_KINDS = ((TypeError, "參數錯誤"), (ValueError, "參數驗證失敗"))
+
+
+
+def _accepted_parameters(handler: Callable[..., Any]) -> Optional[Tuple[frozenset, frozenset]]:
+    """
+    由 handler 的簽章取得可接受與必填的關鍵字參數名稱。
+
+    傳回：
+        (可接受的參數, 必填參數)；handler 接受 **kwargs、含必填的位置限定參數
+        或無法取得簽章時傳回 None，改由呼叫時的 TypeError 判斷。
+    """
+    try:
+        signature = inspect.signature(handler)
+    except (TypeError, ValueError):
+        return None
+    accepted, required = set(), set()
+    for param in signature.parameters.values():
+        if param.kind is param.VAR_KEYWORD:
+            return None
+        if param.kind is param.VAR_POSITIONAL:
+            continue
+        if param.kind is param.POSITIONAL_ONLY:
+            if param.default is param.empty:
+                return None
+            continue
+        accepted.add(param.name)
+        if param.default is param.empty:
+            required.add(param.name)
+    return frozenset(accepted), frozenset(required)
+
+
+def _jit_compile(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    以 numba 將數值運算的 handler 編譯為機器碼；numba 為選用相依套件，
+    未安裝時回傳原函式。
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return handler
+    return njit(cache=True)(handler)
+
 
 class ToolRegistry:
     """
@@ -48,37 +99,35 @@ class ToolRegistry:
             '3'
 
     內部資料結構：
-        self._registry: Dict[str, Dict[str, Any]]
-            - key：工具名稱（str）
-            - value：包含下列鍵值
-                - "schema": Dict[str, Any]
-                    符合 OpenAI tools 規範之函式定義
-                - "handler": Callable[..., Any]
-                    實際執行該工具的函式
+        以工具名稱為鍵的兩個平行字典（依註冊順序）：
+        self._schemas: Dict[str, Dict[str, Any]]
+            - value：符合 OpenAI tools 規範之函式定義
+        self._handlers: Dict[str, Callable[..., Any]]
+            - value：實際執行該工具的函式
+
+        執行工具只需查 `_handlers` 一次；列出 schema 時直接取 `_schemas` 的值。
 
         結構範例（示意）：
-            {
+            self._schemas = {
                 "echo": {
-                    "schema": {
-                        "type": "function",
-                        "function": {
-                            "name": "echo",
-                            "description": "回傳輸入文字（教學用範例）",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {"text": {"type": "string"}},
-                                "required": ["text"],
-                                "additionalProperties": False
-                            }
+                    "type": "function",
+                    "function": {
+                        "name": "echo",
+                        "description": "回傳輸入文字（教學用範例）",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {"text": {"type": "string"}},
+                            "required": ["text"],
+                            "additionalProperties": False
                         }
-                    },
-                    "handler": <callable>
+                    }
                 },
-                "add": {
-                    "schema": { ... },
-                    "handler": <callable>
-                }
+                "add": { ... }
             }
+            self._handlers = {"echo": <callable>, "add": <callable>}
+
+        註冊時另以 `_param_specs` 記下 handler 簽章可接受與必填的參數，
+        執行前先比對，參數不符時不必呼叫 handler 再攔截 TypeError。
 
     內建示例工具：
         （無內建示例工具。請於系統啟動時或模組載入時主動註冊所需工具。）
@@ -88,7 +137,14 @@ class ToolRegistry:
         """
         初始化工具註冊表。
         """
-        self._registry: Dict[str, Dict[str, Any]] = {}
+        self._schemas: Dict[str, Dict[str, Any]] = {} # 工具名稱 -> schema
+        self._handlers: Dict[str, Callable[..., Any]] = {} # 工具名稱 -> 處理函式
+        self._param_specs: Dict[str, Optional[Tuple[frozenset, frozenset]]] = {} # 工具名稱 -> (可接受參數, 必填參數)
+        self._result_caches: Dict[str, Optional[Callable[[tuple], str]]] = {} # 工具名稱 -> 結果快取（未啟用為 None）
+        self._version = 0 # 每次註冊工具遞增，供上層快取判斷工具組合是否改變
+        self._frozen = False # freeze() 後不再接受註冊
+        self._schemas_cache: Optional[Tuple[Dict[str, Any], ...]] = None # 工具 schema 快取，註冊工具時重設
+        self._schemas_json_cache: Optional[str] = None # 工具 schema 的 JSON 字串快取，註冊工具時重設
         self._register_default_tools() # 呼叫註冊預設工具
         
 
@@ -96,6 +152,12 @@ class ToolRegistry:
         """
         註冊預設工具，例如 SQLiteSchemaTool。
         """
+        # 工具後端（sqlite3、httpx 等）延後到實際註冊時才載入，只匯入 ToolRegistry 不需付出這些成本
+        from agentic_breeze.agents.orchestrator_core.tools.sqlite_tool import SQLiteSchemaTool
+        from agentic_breeze.agents.orchestrator_core.tools.weather import CWAWeatherTool
+        from agentic_breeze.agents.orchestrator_core.tools.wiki_tool import WikiTool
+        from agentic_breeze.agents.orchestrator_core.tools.api_tool import APIRequestTool
+
         # -------------------- 註冊 SQLiteSchemaTool ---------------------
         sqlite_tool_instance = SQLiteSchemaTool(db_path="sample_users.db")
 
@@ -200,6 +262,26 @@ class ToolRegistry:
             handler=cwa_weather_tool_instance.get_national_forecast,
         )
 
+        # get_forecasts
+        self.register_tool(
+            name="cwa_get_forecasts",
+            description="一次獲取台灣多個城市的氣象資訊。需要比較或查詢兩個以上地點的天氣時使用，只會向中央氣象署 (CWA) 發送一次請求。",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "location_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "台灣城市名稱列表，請使用標準中文行政區劃名稱，例如：臺北市、臺南市、高雄市、新北市、桃園市、花蓮縣、宜蘭縣。"
+                    },
+                    "dataset_id": {"type": "string", "description": "CWA 資料集的 ID，預設為 'F-C0032-001' (36 小時天氣預報)。", "default": "F-C0032-001"}
+                },
+                "required": ["location_names"],
+                "additionalProperties": False,
+            },
+            handler=cwa_weather_tool_instance.get_forecasts,
+        )
+
         # smart_content
         self.register_tool(
             name="wiki_smart_content",
@@ -223,6 +305,8 @@ class ToolRegistry:
         description: str,
         parameters: Dict[str, Any],
         handler: Callable[..., Any],
+        jit: bool = False,
+        cache_size: int = 0,
     ) -> None:
         """
         註冊工具。
@@ -237,15 +321,37 @@ class ToolRegistry:
                 `parameters` 欄位，用於描述參數型態與必填欄位。
             handler：實際執行函式，呼叫簽名為 `handler(**kwargs)`，需與
                 `parameters` 定義相容。
+            jit：為 True 時以 numba.njit(cache=True) 編譯 handler，適用於純數值
+                運算的工具；首次呼叫時編譯並快取於磁碟。handler 需符合 numba
+                nopython 模式的限制；未安裝 numba 時沿用原函式。
+            cache_size：大於 0 時，以 LRU 快取保存最近 cache_size 組參數序列化後的
+                結果，相同參數不再執行 handler。僅適用於結果只取決於參數的工具；
+                參數含不可雜湊的值（如 list、dict）時不使用快取，且數值 1 與 1.0
+                視為相同參數。不支援協程函式。
 
         例外：
-            ValueError：當 name 為空或 handler 不可呼叫時拋出。
+            ValueError：當 name 為空、handler 不可呼叫，或對協程函式設定
+                cache_size 時拋出。
+            RuntimeError：註冊表已 freeze() 時拋出。
         """
+        if self._frozen:
+            raise RuntimeError(f"註冊表已凍結，無法註冊工具: {name}")
         if not name or not isinstance(name, str):
             raise ValueError("tool name 不可為空，且需為字串。")
         if not callable(handler):
             raise ValueError("handler 必須可呼叫。")
-
+        if cache_size < 0:
+            raise ValueError("cache_size 不可為負數。")
+        if cache_size and inspect.iscoroutinefunction(handler):
+            raise ValueError("協程函式的 handler 不支援 cache_size。")
+
+        # 工具名稱常駐（intern），登錄表鍵與 schema 共用同一個字串物件，
+        # 以同名字面值查詢時可直接以指標比對命中
+        name = sys.intern(name)
+        # 以原始函式的簽章為準（jit 包裝後的物件不一定保留簽章）
+        param_spec = _accepted_parameters(handler)
+        if jit:
+            handler = _jit_compile(handler)
         schema = {
             "type": "function",
             "function": {
@@ -255,7 +361,59 @@ class ToolRegistry:
             },
         }
 
-        self._registry[name] = {"schema": schema, "handler": handler}
+        self._schemas[name] = schema
+        self._handlers[name] = handler
+        self._param_specs[name] = param_spec
+        self._result_caches[name] = self._make_result_cache(handler, cache_size) if cache_size else None
+        self._version += 1
+        self._schemas_cache = None
+        self._schemas_json_cache = None
+
+    def freeze(self) -> None:
+        """
+        凍結註冊表：之後 `register_tool` 會拋出 RuntimeError。
+
+        適用於啟動時註冊完所有工具、之後只供多個執行緒讀取的情境。凍結後
+        內部字典改為唯讀視圖，並預先產生 schema 與其 JSON 快取；版本號不再
+        改變，上層依版本號建立的快取可長期沿用。重複呼叫將被忽略。
+
+        使用範例：
+            >>> registry = ToolRegistry()
+            >>> registry.freeze()
+            >>> registry.is_frozen
+            True
+        """
+        if self._frozen:
+            return
+        self.get_llm_tool_schemas_json()
+        self._schemas = types.MappingProxyType(self._schemas)
+        self._handlers = types.MappingProxyType(self._handlers)
+        self._param_specs = types.MappingProxyType(self._param_specs)
+        self._result_caches = types.MappingProxyType(self._result_caches)
+        self._frozen = True
+
+    @property
+    def is_frozen(self) -> bool:
+        """
+        註冊表是否已凍結。
+
+        傳回：
+            bool：已呼叫 `freeze()` 時為 True。
+        """
+        return self._frozen
+
+    @property
+    def version(self) -> int:
+        """
+        工具註冊版本號。
+
+        每次呼叫 `register_tool` 皆會遞增；上層模組可比對此值，在工具組合
+        改變時清除依賴工具清單的快取（例如規劃系統提示詞）。
+
+        傳回：
+            int：目前的版本號。
+        """
+        return self._version
 
     def get_llm_tool_schemas(self) -> List[Dict[str, Any]]:
         """
@@ -263,11 +421,30 @@ class ToolRegistry:
 
         回傳符合 OpenAI function calling 規格之工具定義，用以作為 LLM 的
         `tools` 參數。每一個元素皆為 `{"type": "function", "function": {...}}`。
+        schema 清單會快取至下次 `register_tool`；回傳的 schema 物件為共用實例，
+        呼叫端不應修改其內容。
 
         傳回：
             List[Dict[str, Any]]：可用工具的 schema 清單。
         """
-        return [entry["schema"] for entry in self._registry.values()]
+        if self._schemas_cache is None:
+            self._schemas_cache = tuple(self._schemas.values())
+        # 回傳新的 list（元素為同一批 schema 物件），呼叫端增刪元素不影響快取
+        return list(self._schemas_cache)
+
+    def get_llm_tool_schemas_json(self) -> str:
+        """
+        取得工具 schema 列表的 JSON 字串。
+
+        序列化結果會快取，直到下次 `register_tool` 才重新產生；需將工具定義
+        嵌入提示詞或請求內容時可直接使用，不必每次重新 json.dumps。
+
+        傳回：
+            str：`get_llm_tool_schemas()` 的 JSON 表示（保留非 ASCII 字元）。
+        """
+        if self._schemas_json_cache is None:
+            self._schemas_json_cache = json.dumps(self.get_llm_tool_schemas(), ensure_ascii=False)
+        return self._schemas_json_cache
 
     # 設計說明（參數位置/關鍵字限制）：
     # - '/'：將 tool_name 設為「位置限定參數」，避免與工具本身參數同名而混淆，並提升可讀性（第一個位置就是工具名）。
@@ -296,43 +473,171 @@ class ToolRegistry:
             - 保留最後一道通用例外攔截，目的在於提供穩定回傳格式與防止流程
               中斷；必要時可透過 raise_on_error 開啟嚴格模式。
         """
-        entry = self._registry.get(tool_name)
-        if not entry:
+        handler = self._handlers.get(tool_name)
+        if handler is None:
             msg = f"{ERROR_PREFIX} 未註冊的工具: {tool_name}"
             if raise_on_error:
                 raise KeyError(msg)
             return msg
 
-        handler: Callable[..., Any] = entry["handler"]
+        msg = self._check_arguments(tool_name, kwargs, raise_on_error)
+        if msg is not None:
+            return msg
+
+        cached = self._result_caches[tool_name]
+        if cached is not None:
+            key = tuple(sorted(kwargs.items()))
+            try:
+                hash(key)
+            except TypeError:
+                cached = None # 參數含不可雜湊的值，直接執行 handler
+
         try:
+            if cached is not None:
+                return cached(key)
             result = handler(**kwargs)
-        except TypeError as e:
-            # 常見於參數不符或缺少必填參數
-            msg = f"{ERROR_PREFIX} 使用工具 '{tool_name}' 時參數錯誤: {e}"
-            if raise_on_error:
-                raise
-            return msg
-        except ValueError as e:
-            # 若未來加入參數驗證（JSON Schema/Pydantic）
-            msg = f"{ERROR_PREFIX} 使用工具 '{tool_name}' 時參數驗證失敗: {e}"
+        except Exception as e:
+            # 單一攔截點：提供穩定錯誤格式並避免流程中斷
             if raise_on_error:
                 raise
+            return self._format_error(tool_name, e)
+
+        return self._serialize_result(result)
+
+    async def execute_tool_async(self, tool_name: str, /, *, raise_on_error: bool = False, **kwargs: Any) -> str:
+        """
+        非同步執行工具。
+
+        處理函式為協程函式時直接 await；一般函式則交由預設執行緒池執行
+        `execute_tool`，讓多個工具可透過 asyncio.gather 並行。錯誤處理與
+        回傳格式與 `execute_tool` 相同。
+
+        參數：
+            tool_name：工具名稱。
+            raise_on_error：為 True 時，遇到錯誤即拋出例外。
+            **kwargs：傳遞給工具處理函式的參數。
+
+        傳回：
+            str：工具回傳內容之字串表示。
+
+        使用範例：
+            >>> results = await asyncio.gather(
+            ...     registry.execute_tool_async("add", a=1, b=2),
+            ...     registry.execute_tool_async("add", a=3, b=4),
+            ... )
+        """
+        handler = self._handlers.get(tool_name)
+        if not inspect.iscoroutinefunction(handler):
+            return await asyncio.to_thread(self.execute_tool, tool_name, raise_on_error=raise_on_error, **kwargs)
+
+        msg = self._check_arguments(tool_name, kwargs, raise_on_error)
+        if msg is not None:
             return msg
+
+        try:
+            result = await handler(**kwargs)
         except Exception as e:
-            # 最後保險攔截：提供穩定錯誤格式並避免流程中斷
-            msg = f"{ERROR_PREFIX} 使用工具 '{tool_name}' 時執行例外: {e}"
             if raise_on_error:
-                raise msg
-            return msg
+                raise
+            return self._format_error(tool_name, e)
+
+        return self._serialize_result(result)
 
+    def _make_result_cache(self, handler: Callable[..., Any], cache_size: int) -> Callable[[tuple], str]:
+        """
+        建立以排序後的 (參數名稱, 值) tuple 為鍵、保存序列化結果的 LRU 快取。
+        handler 拋出的例外不會被快取。
+        """
+        serialize = self._serialize_result
+
+        def run(key: tuple) -> str:
+            return serialize(handler(**dict(key)))
+
+        return functools.lru_cache(maxsize=cache_size)(run)
+
+    def clear_result_caches(self) -> None:
+        """
+        清空所有工具的結果快取；工具依賴的資料（例如資料庫內容）改變時呼叫。
+
+        使用範例：
+            >>> registry.clear_result_caches()
+        """
+        for cached in self._result_caches.values():
+            if cached is not None:
+                cached.cache_clear()
+
+    def _check_arguments(self, tool_name: str, kwargs: Dict[str, Any], raise_on_error: bool) -> Optional[str]:
+        """
+        依註冊時記下的簽章比對參數；參數相符或無法預先判斷時傳回 None，
+        不符時傳回錯誤訊息（嚴格模式下拋出 TypeError）。
+        """
+        spec = self._param_specs[tool_name]
+        if spec is None:
+            return None
+        accepted, required = spec
+        unexpected = kwargs.keys() - accepted
+        missing = required - kwargs.keys()
+        if not unexpected and not missing:
+            return None
+        problems = []
+        if missing:
+            problems.append(f"缺少必填參數 {sorted(missing)}")
+        if unexpected:
+            problems.append(f"不支援的參數 {sorted(unexpected)}")
+        error = TypeError("；".join(problems))
+        if raise_on_error:
+            raise error
+        return self._format_error(tool_name, error)
+
+    @staticmethod
+    def _format_error(tool_name: str, error: Exception) -> str:
+        """
+        將工具執行時的例外轉為具固定前綴之錯誤訊息。
+        """
+        kind = next((label for exc_type, label in _ERROR_KINDS if isinstance(error, exc_type)), "執行例外")
+        return f"{ERROR_PREFIX} 使用工具 '{tool_name}' 時{kind}: {error}"
+
+    @staticmethod
+    def _serialize_result(result: Any) -> str:
+        """
+        將工具回傳值轉為字串：字串原樣回傳，bytes/bytearray 以 UTF-8 解碼
+        （無法解碼的位元組以替代字元表示），其餘序列化為 JSON（安裝 orjson 時
+        numpy 陣列與純量亦直接輸出為 JSON），非 JSON 相容的值以 str() 表示。
+        """
         if isinstance(result, str):
             return result
-
+        if isinstance(result, (bytes, bytearray)):
+            # 直接解碼，避免落入 JSON 路徑後被 str() 表示為 "b'...'"
+            return result.decode("utf-8", "replace")
+        if orjson is not None:
+            # 查詢結果可達數百列，orjson 直接輸出 UTF-8，序列化成本遠低於 json
+            try:
+                # OPT_SERIALIZE_NUMPY：numpy 陣列（如 jit 數值工具的輸出）直接輸出為 JSON 陣列
+                return orjson.dumps(result, default=str,
+                                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+            except orjson.JSONEncodeError:
+                pass  # 例如超過 64 位元的整數；交由 json 處理
         try:
-            if isinstance(result, (dict, list, int, float, bool)) or result is None:
-                return json.dumps(result, ensure_ascii=False)
-            # 對於非常規型別，改以 str() 以避免洩漏內部資訊
+            # default=str 讓非常規型別以 str() 表示，不需逐一判斷型別
+            return json.dumps(result, ensure_ascii=False, default=str)
+        except ValueError:
+            # 例如循環參照；退回 str()，保證回傳文字格式
             return str(result)
-        except Exception:
-            # 序列化出錯時退回 str()，保證回傳文字格式
-            return str(result)
\ No newline at end of file
+
+
+@functools.lru_cache(maxsize=1)
+def get_default_registry() -> ToolRegistry:
+    """
+    取得行程共用的預設工具註冊表。
+
+    首次呼叫時建立並註冊預設工具，之後回傳同一個實例，讓規劃與執行等
+    模組共用相同的工具實例（SQLite 連線、HTTP 連線池）與 schema 物件。
+
+    傳回：
+        ToolRegistry：共用的工具註冊表。
+
+    使用範例：
+        >>> get_default_registry() is get_default_registry()
+        True
+    """
+    return ToolRegistry()